@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+
+# Decimation algorithm implementation (quadric error metric edge collapse)
+# Usage: ./decimate <input.obj> <output.obj|ply|stl|glb> <faces> [--max-error E]
+# Antonio Manjavacas
+
+
+import argparse
+import heapq
+import os
+import sys
+
+from math import sqrt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from meshlib import load_obj, save_mesh, Mesh
+from meshlib.formats import WRITERS, format_of
+
+# Open borders and non-manifold edges are held in place by planes this many
+# times heavier than faces
+BOUNDARY_WEIGHT = 1000.0
+
+
+def plane_quadric(a, b, c, d, weight=1.0):
+
+    # Squared distance to the plane ax + by + cz + d = 0, stored as the
+    # upper triangle of its symmetric 4x4 matrix
+    return [weight * q for q in (a * a, a * b, a * c, a * d,
+                                 b * b, b * c, b * d,
+                                 c * c, c * d,
+                                 d * d)]
+
+
+def add_quadric(q, r):
+    for i in range(10):
+        q[i] += r[i]
+
+
+def quadric_error(q, x, y, z):
+    return (q[0] * x * x + 2 * q[1] * x * y + 2 * q[2] * x * z + 2 * q[3] * x
+            + q[4] * y * y + 2 * q[5] * y * z + 2 * q[6] * y
+            + q[7] * z * z + 2 * q[8] * z
+            + q[9])
+
+
+def optimal_position(q):
+
+    # Point of minimum error, solving the 3x3 linear system by Cramer's
+    # rule. None when the system is (nearly) singular.
+    a11, a12, a13, b1 = q[0], q[1], q[2], -q[3]
+    a22, a23, b2 = q[4], q[5], -q[6]
+    a33, b3 = q[7], -q[8]
+
+    det = (a11 * (a22 * a33 - a23 * a23)
+           - a12 * (a12 * a33 - a23 * a13)
+           + a13 * (a12 * a23 - a22 * a13))
+
+    scale = max(abs(a11), abs(a22), abs(a33))
+    if scale == 0 or abs(det) <= 1e-9 * scale ** 3:
+        return None
+
+    x = (b1 * (a22 * a33 - a23 * a23)
+         - a12 * (b2 * a33 - a23 * b3)
+         + a13 * (b2 * a23 - a22 * b3)) / det
+    y = (a11 * (b2 * a33 - a23 * b3)
+         - b1 * (a12 * a33 - a23 * a13)
+         + a13 * (a12 * b3 - b2 * a13)) / det
+    z = (a11 * (a22 * b3 - b2 * a23)
+         - a12 * (a12 * b3 - b2 * a13)
+         + b1 * (a12 * a23 - a22 * a13)) / det
+
+    return (x, y, z)
+
+
+def cross(u, v):
+    return (u[1] * v[2] - u[2] * v[1],
+            u[2] * v[0] - u[0] * v[2],
+            u[0] * v[1] - u[1] * v[0])
+
+
+def face_normal(p1, p2, p3):
+
+    # Unnormalized normal, its module is twice the face area
+    return cross((p2[0] - p1[0], p2[1] - p1[1], p2[2] - p1[2]),
+                 (p3[0] - p1[0], p3[1] - p1[1], p3[2] - p1[2]))
+
+
+class Decimator:
+
+    # Collapses edges in order of quadric error. Every vertex keeps the
+    # set of faces around it, so finding the edges and faces touched by a
+    # collapse is local, and candidate edges wait in a heap. Heap entries
+    # are not updated in place: each vertex has a version number that
+    # grows when it moves, and entries made for an older version are
+    # skipped when popped.
+
+    def __init__(self, mesh):
+
+        self.positions = [tuple(v) for v in mesh.vertices()]
+        self.faces = [list(f) for f in mesh.face_tuples()]
+        self.face_count = len(self.faces)
+
+        n = len(self.positions)
+        self.vertex_faces = [set() for i in range(n)]
+        self.quadrics = [[0.0] * 10 for i in range(n)]
+        self.version = [0] * n
+        self.removed = [False] * n
+        self.merged = {}
+
+        self.heap = []
+        self.pushed = 0
+
+        # Edge -> faces using it, to find open borders and edges shared by
+        # more than two faces. Repeated faces (same corners) count once.
+        edge_faces = {}
+
+        for f, face in enumerate(self.faces):
+            p = [self.positions[v] for v in face]
+            nx, ny, nz = face_normal(*p)
+            area = sqrt(nx * nx + ny * ny + nz * nz)
+
+            for k in range(3):
+                self.vertex_faces[face[k]].add(f)
+                a, b = face[k], face[(k + 1) % 3]
+                edge_faces.setdefault((min(a, b), max(a, b)), []).append((f, a, b))
+
+            # Degenerate faces give no plane
+            if area == 0:
+                continue
+
+            nx, ny, nz = nx / area, ny / area, nz / area
+            q = plane_quadric(nx, ny, nz, -(nx * p[0][0] + ny * p[0][1] + nz * p[0][2]),
+                              area / 2)
+            for v in face:
+                add_quadric(self.quadrics[v], q)
+
+        for edge, users in edge_faces.items():
+            if len(set(frozenset(self.faces[f]) for f, a, b in users)) != 2:
+                for user in users:
+                    self.add_boundary(*user)
+
+        for a, b in edge_faces:
+            self.push(a, b)
+
+    def add_boundary(self, f, a, b):
+
+        # Plane through the border edge, perpendicular to its face
+        pa, pb = self.positions[a], self.positions[b]
+        edge = (pb[0] - pa[0], pb[1] - pa[1], pb[2] - pa[2])
+        m = cross(edge, face_normal(*[self.positions[v] for v in self.faces[f]]))
+        module = sqrt(m[0] * m[0] + m[1] * m[1] + m[2] * m[2])
+        if module == 0:
+            return
+
+        m = (m[0] / module, m[1] / module, m[2] / module)
+        length2 = edge[0] * edge[0] + edge[1] * edge[1] + edge[2] * edge[2]
+        q = plane_quadric(m[0], m[1], m[2],
+                          -(m[0] * pa[0] + m[1] * pa[1] + m[2] * pa[2]),
+                          BOUNDARY_WEIGHT * length2)
+        add_quadric(self.quadrics[a], q)
+        add_quadric(self.quadrics[b], q)
+
+    def push(self, a, b):
+
+        q = list(self.quadrics[a])
+        add_quadric(q, self.quadrics[b])
+
+        # Optimal point, or the best of both ends and the midpoint
+        target = optimal_position(q)
+        if target is None:
+            pa, pb = self.positions[a], self.positions[b]
+            middle = ((pa[0] + pb[0]) / 2, (pa[1] + pb[1]) / 2, (pa[2] + pb[2]) / 2)
+            target = min((pa, pb, middle), key=lambda p: quadric_error(q, *p))
+
+        cost = max(quadric_error(q, *target), 0.0)
+
+        self.pushed += 1
+        heapq.heappush(self.heap, (cost, self.pushed, a, b,
+                                   self.version[a], self.version[b], target))
+
+    def neighbours(self, v):
+        result = set()
+        for f in self.vertex_faces[v]:
+            result.update(self.faces[f])
+        result.discard(v)
+        return result
+
+    def can_collapse(self, a, b, target):
+
+        shared = self.vertex_faces[a] & self.vertex_faces[b]
+
+        # Link condition: the only vertices next to both ends are the
+        # opposite corners of the faces on the edge, so the surface stays
+        # manifold
+        if len(self.neighbours(a) & self.neighbours(b)) != len(shared):
+            return False
+
+        # No remaining face may turn over
+        for v in (a, b):
+            for f in self.vertex_faces[v] - shared:
+                p = [self.positions[u] for u in self.faces[f]]
+                old = face_normal(*p)
+                p[self.faces[f].index(v)] = target
+                new = face_normal(*p)
+                if old[0] * new[0] + old[1] * new[1] + old[2] * new[2] <= 0:
+                    return False
+
+        return True
+
+    def collapse(self, a, b, target):
+
+        # b is merged into a, which moves to target
+        shared = self.vertex_faces[a] & self.vertex_faces[b]
+
+        for f in shared:
+            for v in self.faces[f]:
+                if v != a and v != b:
+                    self.vertex_faces[v].discard(f)
+            self.faces[f] = None
+            self.face_count -= 1
+
+        for f in self.vertex_faces[b] - shared:
+            face = self.faces[f]
+            face[face.index(b)] = a
+            self.vertex_faces[a].add(f)
+
+        self.vertex_faces[a] -= shared
+        self.vertex_faces[b] = set()
+
+        self.positions[a] = target
+        add_quadric(self.quadrics[a], self.quadrics[b])
+        self.version[a] += 1
+        self.removed[b] = True
+        self.merged[b] = a
+
+        for v in self.neighbours(a):
+            self.push(a, v)
+
+    def run(self, target_faces, max_error=None):
+
+        # Collapse until the mesh has target_faces faces or the next
+        # collapse would exceed max_error (a distance)
+        limit = None if max_error is None else max_error * max_error
+
+        while self.face_count > target_faces and self.heap:
+            cost, _, a, b, va, vb, target = heapq.heappop(self.heap)
+
+            if self.removed[a] or self.removed[b]:
+                continue
+            if self.version[a] != va or self.version[b] != vb:
+                continue
+            if limit is not None and cost > limit:
+                break
+            if self.can_collapse(a, b, target):
+                self.collapse(a, b, target)
+
+        return self.face_count
+
+    def find(self, v):
+        while v in self.merged:
+            v = self.merged[v]
+        return v
+
+    def to_mesh(self, like=None):
+
+        # Remaining vertices and faces, in their original order
+        mesh = Mesh()
+        if like is not None:
+            mesh.header = like.header
+            mesh.name = like.name
+            mesh.smoothing = like.smoothing
+
+        index = {}
+        for v, p in enumerate(self.positions):
+            if not self.removed[v]:
+                index[v] = len(index)
+                mesh.positions.extend(p)
+
+        for face in self.faces:
+            if face is not None:
+                mesh.faces.extend(index[v] for v in face)
+
+        if like is not None:
+            for a, b in like.line_tuples():
+                a, b = self.find(a), self.find(b)
+                if a != b:
+                    mesh.lines.extend((index[a], index[b]))
+
+        return mesh
+
+
+def decimate(input_file, output_file, faces, max_error=None, precision=None,
+             format=None):
+
+    # Get data from .obj file
+    mesh = load_obj(input_file)
+
+    # A target below 1 is a fraction of the input faces
+    if faces < 1:
+        faces = int(mesh.face_count * faces)
+
+    # Apply decimation
+    decimator = Decimator(mesh)
+    decimator.run(faces, max_error)
+
+    # Generate new mesh file
+    save_mesh(output_file, decimator.to_mesh(mesh), format, precision=precision)
+
+    return mesh.face_count, decimator.face_count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        usage='./decimate <input.obj> <output.obj|ply|stl|glb> <faces> [--max-error E] '
+              '[--precision N] [--format F]')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('faces', help='target face count, or a fraction of the '
+                                      'input faces when below 1')
+    parser.add_argument('--max-error', type=float,
+                        help='stop before collapses that move the surface further '
+                             'than this distance')
+    parser.add_argument('--precision', type=int,
+                        help='decimals written per coordinate (default: exact)')
+    parser.add_argument('--format', choices=sorted(WRITERS),
+                        help='output format (default: from the output extension)')
+    args = parser.parse_args()
+
+    if not args.input.endswith('.obj'):
+        print('Error: input file must have .obj extension')
+        exit()
+
+    try:
+        format = format_of(args.output, args.format)
+    except ValueError:
+        print('Error: output must be one of: ' + ', '.join('.' + f for f in WRITERS))
+        exit()
+
+    try:
+        faces = float(args.faces)
+    except:
+        print('Error: faces argument must be a number')
+        exit()
+    print('\n================ DECIMATION ================\n')
+    print('Decimating ' + args.input + ' to ' + args.faces + ' faces ...')
+    before, after = decimate(args.input, args.output, faces, args.max_error,
+                             args.precision, format)
+    print('> Faces: ' + str(before) + ' -> ' + str(after))
+    print('\nDone! Mesh saved in ' + args.output)
+    print('\n============================================\n')
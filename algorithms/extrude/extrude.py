@@ -1,114 +1,45 @@
 #!/usr/bin/env python
 
 # Extrusion algorithm implementation
-# Usage: ./extrude <input.obj> <output.obj> <length>
+# Usage: ./extrude <input.obj> <output.obj|ply|stl|glb> <length> [--region]
 # Antonio Manjavacas
 
 
-from sys import argv
-from math import pow, sqrt
+import argparse
+import os
+import sys
 
-FILE_HEADER = ''
-OBJ_NAME = ''
-SMOOTH_SHADING = ''
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 
-ID_COUNTER = 1
+from meshlib import load_obj, save_mesh, Mesh, MeshCache, Welder
+from meshlib.formats import WRITERS, format_of
+from meshlib.topology import (EdgeIndex, Prisms, Vector, Vertex, prism_faces, to_mesh,
+                              to_objects)
+from meshlib.weld import weld_array
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-class Vertex:
-    def __init__(self, id, x, y, z):
-        self.id = id
-        self.x = x
-        self.y = y
-        self.z = z
+# Generated vertices closer than this are merged into one
+WELD_EPSILON = 1e-6
 
-    def __str__(self):
-        return 'v' + ' ' + str(self.x) + ' ' + str(self.y) + ' ' + str(self.z)
+# Part of the cache key: bump when the extruded meshes change
+VERSION = 1
 
-    def __eq__(self, v):
-        if isinstance(v, Vertex):
-            return self.x == v.x and self.y == v.y and self.z == v.z
-        else:
-            return False
 
+def apply_extrusion(vertices, faces, length, welder=None, unique_walls=False):
 
-class Vector:
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.module = sqrt(pow(self.x, 2) + pow(self.y, 2) + pow(self.z, 2))
-
-
-class Face:
-    def __init__(self, v1, v2, v3):
-        self.v1 = v1
-        self.v2 = v2
-        self.v3 = v3
-        self.vertices = [v1, v2, v3]
-
-        a = Vector(v2.x - v1.x, v2.y - v1.y, v2.z - v1.z)
-
-        b = Vector(v3.x - v1.x, v3.y - v1.y, v3.z - v1.z)
-
-        n = Vector((a.y * b.z - a.z * b.y),
-                   (a.z * b.x - a.x * b.z),
-                   (a.x * b.y - a.y * b.x))
-
-        self.normal = Vector(n.x/n.module, n.y/n.module, n.z/n.module)
-
-    def __str__(self):
-        return 'f' + ' ' + str(self.v1.id) + ' ' + str(self.v2.id) + ' ' + str(self.v3.id)
-
-    def __eq__(self, f):
-        if isinstance(f, Face):
-            other_vertices = [f.v1, f.v2, f.v3]
-            return (self.v1 in other_vertices and
-                    self.v2 in other_vertices and
-                    self.v3 in other_vertices)
-        else:
-            return False
-
-
-def parse_obj(obj_file):
-
-    global ID_COUNTER
-    global FILE_HEADER
-    global OBJ_NAME
-    global SMOOTH_SHADING
-
-    vertices = []
-    faces = []
-
-    with open(obj_file) as file:
-        for line in file:
-            words = line.split()
-            if words[0] == 'v':
-                vertices.append(
-                    Vertex(ID_COUNTER, float(words[1]), float(words[2]), float(words[3])))
-                ID_COUNTER += 1
-            elif words[0] == 'f':
-                v1 = [v for v in vertices if v.id == int(words[1])][0]
-                v2 = [v for v in vertices if v.id == int(words[2])][0]
-                v3 = [v for v in vertices if v.id == int(words[3])][0]
-                faces.append(Face(v1, v2, v3))
-            elif words[0] == '#':
-                FILE_HEADER += line
-            elif words[0] == 'o':
-                OBJ_NAME = line
-            elif words[0] == 's':
-                SMOOTH_SHADING = line
-
-    return vertices, faces
-
-
-def apply_extrusion(vertices, faces, length):
-
-    global ID_COUNTER
+    if welder is None:
+        welder = Welder(WELD_EPSILON)
 
     new_vertices = []
     new_faces = []
 
+    # Frontal faces and side walls, without repeating vertex sets
+    prisms = Prisms(unique_walls)
+
     for face in faces:
 
         # Translation vector
@@ -135,88 +66,229 @@ def apply_extrusion(vertices, faces, length):
                     new_vertex_coords[i] += TM[i][j] * vertex[j]
 
             new_vertex = Vertex(
-                None, new_vertex_coords[0], new_vertex_coords[1], new_vertex_coords[2])
+                new_vertex_coords[0], new_vertex_coords[1], new_vertex_coords[2])
 
-            # Check if the vertex was already created
-            if new_vertex not in new_vertices:
-                new_vertex.id = ID_COUNTER
-                ID_COUNTER += 1
+            # Reuse the vertex if one was already created at this position
+            welded_vertex = welder.weld(
+                new_vertex.x, new_vertex.y, new_vertex.z, new_vertex)
+            if welded_vertex is new_vertex:
                 new_vertices.append(new_vertex)
             else:
-                new_vertex = [v for v in new_vertices if v == new_vertex][0]
+                new_vertex = welded_vertex
 
             new_face_vertices.append(new_vertex)
 
         # GENERATE NEW FACES
-        v1 = face.v1
-        v2 = face.v2
-        v3 = face.v3
-
-        new_v1 = new_face_vertices[0]
-        new_v2 = new_face_vertices[1]
-        new_v3 = new_face_vertices[2]
-
-        # New frontal face
-        new_face = Face(new_v1, new_v2, new_v3)
-        if new_face not in new_faces:
-            new_faces.append(new_face)
-
-        # Additional lateral faces
-        new_faces.append(Face(v1, v2, new_v2))
-        new_faces.append(Face(v1, new_v1, new_v2))
-        new_faces.append(Face(v2, v3, new_v3))
-        new_faces.append(Face(v2, new_v2, new_v3))
-        new_faces.append(Face(v1, v3, new_v3))
-        new_faces.append(Face(v1, new_v1, new_v3))
+        new_faces += prisms.faces(face, new_face_vertices)
 
     return new_vertices, new_faces
 
 
-def create_output(vertices, faces, output_file):
+def apply_extrusion_vectorized(mesh, length, epsilon=WELD_EPSILON,
+                               unique_walls=False):
+
+    # Same result as apply_extrusion, computed with array operations over
+    # the whole mesh. Returns the extruded mesh and the welded vertex count.
+
+    positions = mesh.positions_view()
+    faces = mesh.faces_view().astype(np.int64)
+    vertex_count = len(positions)
+    face_count = len(faces)
+
+    if face_count == 0:
+        return mesh, 0
+
+    # (F, 3, 3) array with the corners of every triangle
+    corners = positions[faces]
+
+    # Face normals, computed in bulk and cached by the mesh (zero for
+    # degenerate faces)
+    normals = np.frombuffer(mesh.face_normals(), dtype=np.float64).reshape(-1, 3)
+
+    # GENERATE NEW VERTICES
+    # Translate every corner along its face normal at once
+    moved = (corners + (length * normals)[:, None, :]).reshape(-1, 3)
+
+    # Weld keeping first occurrences in their original order, so vertex
+    # ids match the per-face algorithm
+    first, inverse = weld_array(moved, epsilon)
+
+    new_positions = moved[first]
+    new_ids = (vertex_count + inverse).reshape(-1, 3)
+    welded = len(moved) - len(first)
 
-    with open(output_file, 'w') as file:
-        file.write(FILE_HEADER)
-        file.write(OBJ_NAME)
+    # GENERATE NEW FACES
+    # Frontal face and six lateral faces per input face
+    new_faces = prism_faces(faces, new_ids, unique_walls)
 
-        for v in vertices:
-            file.write(str(v) + '\n')
+    result = Mesh.from_numpy(np.concatenate([positions, new_positions]),
+                             np.concatenate([faces, new_faces]))
+    result.header = mesh.header
+    result.name = mesh.name
+    result.smoothing = mesh.smoothing
 
-        file.write(SMOOTH_SHADING)
+    return result, welded
 
-        for f in faces:
-            file.write(str(f) + '\n')
 
+def apply_region_extrusion(mesh, length, edges=None):
 
-def extrude(input_file, output_file, length):
+    # Extrudes every connected region as a whole: vertices move along
+    # their averaged normal, the original faces are flipped to close the
+    # bottom and side walls are only built on boundary edges. Returns the
+    # extruded mesh and the number of boundary edges.
 
-    # Get data from .obj file
-    vertices, faces = parse_obj(input_file)
+    if edges is None:
+        edges = EdgeIndex(mesh)
+
+    p = mesh.positions
+
+    # Vertex normals: normals of the faces around each vertex averaged
+    # with their area as weight
+    normals = mesh.vertex_normals()
+
+    # GENERATE NEW VERTICES
+    # One moved copy of every vertex used by a face
+    result = Mesh()
+    result.header = mesh.header
+    result.name = mesh.name
+    result.smoothing = mesh.smoothing
+    result.positions.extend(p)
+
+    moved = {}
+    for v in mesh.faces:
+        if v in moved:
+            continue
+        moved[v] = result.add_vertex(p[3 * v] + length * normals[3 * v],
+                                     p[3 * v + 1] + length * normals[3 * v + 1],
+                                     p[3 * v + 2] + length * normals[3 * v + 2])
+
+    # GENERATE NEW FACES
+    for a, b, c in mesh.face_tuples():
+        # Flipped original face and new frontal face
+        result.add_face(a, c, b)
+        result.add_face(moved[a], moved[b], moved[c])
+
+    # Side walls on boundary edges, facing outwards
+    boundary = edges.boundary()
+    for a, b in boundary:
+        result.add_face(a, b, moved[b])
+        result.add_face(a, moved[b], moved[a])
+
+    if length < 0:
+        # Extruding backwards turns the solid inside out
+        f = result.faces
+        for i in range(0, len(f), 3):
+            f[i + 1], f[i + 2] = f[i + 2], f[i + 1]
+
+    return result, len(boundary)
+
+
+def extrude_mesh(mesh, length, epsilon=WELD_EPSILON, region=False, unique_walls=False):
+
+    # Extruded copy of 'mesh' and the welded vertex count (boundary edge
+    # count in region mode)
+    if region:
+        return apply_region_extrusion(mesh, length)
+
+    if np is not None:
+        return apply_extrusion_vectorized(mesh, length, epsilon, unique_walls)
+
+    # Pure-Python fallback when NumPy is not installed
+    vertices, faces = to_objects(mesh)
 
     # Apply extrusion
-    new_vertices, new_faces = apply_extrusion(vertices, faces, length)
+    welder = Welder(epsilon)
+    new_vertices, new_faces = apply_extrusion(vertices, faces, length, welder,
+                                              unique_walls)
 
     vertices += new_vertices
     faces += new_faces
 
-    # Generate new .obj file
-    create_output(vertices, faces, output_file)
+    return to_mesh(vertices, faces, mesh), welder.welded
+
+
+def extrude(input_file, output_file, length, epsilon=WELD_EPSILON,
+            precision=None, format=None, region=False, normals=False,
+            unique_walls=False, cache=None):
+
+    def build():
+        # Get data from .obj file
+        mesh = load_obj(input_file)
+        return extrude_mesh(mesh, length, epsilon, region, unique_walls)
+
+    def save(result):
+        # Generate new mesh file
+        save_mesh(output_file, result, format, precision=precision, normals=normals)
+
+    if cache is None:
+        result, count = build()
+        save(result)
+        return count
+
+    # A result cached for the same input and parameters is written
+    # without loading or extruding anything
+    key = cache.key(input_file, 'extrude', VERSION, length=length,
+                    epsilon=epsilon, region=region, unique_walls=unique_walls)
+    return cache.run(key, build, save)
 
 
 if __name__ == '__main__':
-    if len(argv) != 4:
-        print('Usage: ./extrude <input.obj> <output.obj> <length>')
+    parser = argparse.ArgumentParser(
+        usage='./extrude <input.obj> <output.obj|ply|stl|glb> <length> [weld epsilon] '
+              '[--region] [--unique-walls] [--normals] [--precision N] [--format F] '
+              '[--cache [DIR]] [--cache-size MB]')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('length')
+    parser.add_argument('epsilon', nargs='?', default=str(WELD_EPSILON))
+    parser.add_argument('--region', action='store_true',
+                        help='extrude connected regions as a whole, with walls '
+                             'only on boundary edges')
+    parser.add_argument('--unique-walls', action='store_true',
+                        help='build side walls shared by neighbouring faces only once')
+    parser.add_argument('--normals', action='store_true',
+                        help='write smooth vertex normals (obj vn, glb NORMAL)')
+    parser.add_argument('--precision', type=int,
+                        help='decimals written per coordinate (default: exact)')
+    parser.add_argument('--format', choices=sorted(WRITERS),
+                        help='output format (default: from the output extension)')
+    parser.add_argument('--cache', nargs='?', const='',
+                        help='reuse results of previous runs stored in DIR '
+                             '(default: $MESHLIB_CACHE or ~/.cache/meshlib)')
+    parser.add_argument('--cache-size', type=float, default=1024,
+                        help='cache size limit in MB (default: 1024)')
+    args = parser.parse_args()
+
+    if not args.input.endswith('.obj'):
+        print('Error: input file must have .obj extension')
         exit()
-    elif argv[1].endswith('.obj') and argv[2].endswith('.obj'):
-        try:
-            length = float(argv[3])
-        except:
-            print('Error: third argument must be a number')
-            exit()
-        print('\n================ EXTRUSION ================\n')
-        print('Extruding ' + argv[1] + ' with length = ' + argv[3] + ' ...')
-        extrude(argv[1], argv[2], length)
-        print('\nDone! Mesh saved in ' + argv[2])
-        print('\n===========================================\n')
-    else:
-        print('Error: input and output files must have .obj extension')
+
+    try:
+        format = format_of(args.output, args.format)
+    except ValueError:
+        print('Error: output must be one of: ' + ', '.join('.' + f for f in WRITERS))
+        exit()
+
+    try:
+        length = float(args.length)
+        epsilon = float(args.epsilon)
+    except:
+        print('Error: length and epsilon arguments must be numbers')
         exit()
+
+    cache = None
+    if args.cache is not None:
+        cache = MeshCache(args.cache or None, int(args.cache_size * 1e6))
+
+    print('\n================ EXTRUSION ================\n')
+    print('Extruding ' + args.input + ' with length = ' + args.length + ' ...')
+    count = extrude(args.input, args.output, length, epsilon, args.precision, format,
+                    args.region, args.normals, args.unique_walls, cache)
+    if args.region:
+        print('> Boundary edges: ' + str(count))
+    else:
+        print('> Welded vertices: ' + str(count))
+    if cache is not None:
+        print('> Cache: ' + ('hit' if cache.hits else 'miss'))
+    print('\nDone! Mesh saved in ' + args.output)
+    print('\n===========================================\n')
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+
+# Chains extrusions, spins, decimations and affine transforms on one mesh
+# Usage: ./meshtool <input.obj> --out <output.obj|ply|stl|glb> [stages ...]
+#   e.g. ./meshtool in.obj --extrude 2 --spin 12,360,Y --scale 0.5 --out out.glb
+# Antonio Manjavacas
+
+
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.join(HERE, '..', '..'))
+for tool in ('extrude', 'spin', 'decimate'):
+    sys.path.insert(0, os.path.join(HERE, '..', tool))
+
+from meshlib import load_obj, save_mesh
+from meshlib.formats import WRITERS, format_of
+from meshlib.transform import compose, rotation, scaling, transform, translation
+
+from extrude import extrude_mesh, WELD_EPSILON
+from spin import bounded_steps, spin_mesh
+from decimate import Decimator
+
+AXES = ('X', 'Y', 'Z')
+
+
+class Stage(argparse.Action):
+
+    # Stages are kept in command line order, whatever their option
+    def __call__(self, parser, namespace, values, option_string=None):
+        try:
+            stage = parse_stage(self.dest, values)
+        except ValueError as e:
+            parser.error(option_string + ': ' + str(e))
+        namespace.stages = namespace.stages + [stage]
+
+
+def numbers(text, count):
+    values = [float(v) for v in text.split(',')]
+    if len(values) not in count:
+        raise ValueError('expected ' + ' or '.join(map(str, count)) + ' numbers')
+    return values
+
+
+def spin_arguments(text):
+
+    # STEPS,ANGLE,AXIS
+    words = text.split(',')
+    if len(words) != 3 or words[2] not in AXES:
+        raise ValueError('expected STEPS,ANGLE,AXIS with AXIS one of X, Y, Z')
+    return int(words[0]), float(words[1]), words[2]
+
+
+def parse_stage(name, text):
+
+    # (operation, arguments); affine ones are turned into their matrix
+    if name in ('extrude', 'region'):
+        return (name, float(text))
+    if name in ('spin', 'revolve'):
+        return (name, spin_arguments(text))
+    if name == 'decimate':
+        return (name, float(text))
+    if name == 'translate':
+        return ('transform', translation(*numbers(text, (3,))))
+    if name == 'scale':
+        factors = numbers(text, (1, 3))
+        return ('transform', scaling(*(factors * 3 if len(factors) == 1 else factors)))
+    if name == 'rotate':
+        words = text.split(',')
+        if len(words) != 2 or words[1] not in AXES:
+            raise ValueError('expected ANGLE,AXIS with AXIS one of X, Y, Z')
+        return ('transform', rotation(words[1], float(words[0])))
+    raise ValueError('unknown stage ' + name)
+
+
+def fuse(stages):
+
+    # Runs of consecutive transforms become a single matrix, given with
+    # the number of transforms it replaces
+    result = []
+    for operation, argument in stages:
+        if operation == 'transform' and result and result[-1][0] == 'transform':
+            result[-1][1].append(argument)
+        elif operation == 'transform':
+            result.append(('transform', [argument]))
+        else:
+            result.append((operation, argument))
+
+    return [('transform', (compose(argument), len(argument))) if operation == 'transform'
+            else (operation, argument) for operation, argument in result]
+
+
+def run_stages(mesh, stages, epsilon=WELD_EPSILON, max_chord_error=None):
+
+    # Applies the stages in order to the in-memory mesh. Returns the final
+    # mesh and a report line per stage. With max_chord_error the steps of
+    # a revolution are the fewest meeting it, a ValueError when more than
+    # those given are needed.
+    report = []
+
+    for operation, argument in fuse(stages):
+
+        if operation == 'extrude':
+            mesh, welded = extrude_mesh(mesh, argument, epsilon)
+            line = 'extrude ' + str(argument) + ': ' + str(welded) + ' welded vertices'
+
+        elif operation == 'region':
+            mesh, boundary = extrude_mesh(mesh, argument, epsilon, region=True)
+            line = 'region extrude ' + str(argument) + ': ' + str(boundary) + ' boundary edges'
+
+        elif operation in ('spin', 'revolve'):
+            steps, angle, axis = argument
+            if operation == 'revolve' and max_chord_error is not None:
+                steps = bounded_steps(mesh, steps, angle, axis, max_chord_error)
+            mesh, welded = spin_mesh(mesh, steps, angle, axis, epsilon,
+                                     revolve=operation == 'revolve')
+            line = (operation + ' ' + str(steps) + ' steps, ' + str(angle) + ' deg, ' + axis
+                    + ': ' + str(welded) + ' welded vertices')
+
+        elif operation == 'decimate':
+            # A target below 1 is a fraction of the current faces
+            target = int(mesh.face_count * argument) if argument < 1 else int(argument)
+            decimator = Decimator(mesh)
+            decimator.run(target)
+            mesh = decimator.to_mesh(mesh)
+            line = 'decimate: ' + str(mesh.face_count) + ' faces'
+
+        else:
+            matrix, count = argument
+            mesh = transform(mesh, matrix)
+            line = 'transform (' + str(count) + ' fused)'
+
+        report.append(line + ' -> ' + str(mesh.vertex_count) + ' vertices, '
+                      + str(mesh.face_count) + ' faces')
+
+    return mesh, report
+
+
+def meshtool(input_file, output_file, stages, epsilon=WELD_EPSILON, precision=None,
+             format=None, normals=False, max_chord_error=None):
+
+    # The input is read and the output written once, whatever the number
+    # of stages
+    mesh = load_obj(input_file)
+    mesh, report = run_stages(mesh, stages, epsilon, max_chord_error)
+    save_mesh(output_file, mesh, format, precision=precision, normals=normals)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        usage='./meshtool <input.obj> --out <output.obj|ply|stl|glb> '
+              '[--extrude L] [--region L] [--spin S,A,AXIS] [--revolve S,A,AXIS] '
+              '[--decimate N] [--translate X,Y,Z] [--scale S|X,Y,Z] [--rotate A,AXIS] '
+              '[--epsilon E] [--max-chord-error E] [--normals] [--precision N] [--format F]')
+    parser.set_defaults(stages=[])
+    parser.add_argument('input')
+    parser.add_argument('--out', required=True, help='output mesh file')
+    parser.add_argument('--extrude', action=Stage, metavar='LENGTH',
+                        help='extrude every face along its normal')
+    parser.add_argument('--region', action=Stage, metavar='LENGTH',
+                        help='extrude connected regions as a whole')
+    parser.add_argument('--spin', action=Stage, metavar='STEPS,ANGLE,AXIS',
+                        help='spin every face about its center')
+    parser.add_argument('--revolve', action=Stage, metavar='STEPS,ANGLE,AXIS',
+                        help='surface of revolution of the whole mesh')
+    parser.add_argument('--decimate', action=Stage, metavar='FACES',
+                        help='target face count, or a fraction when below 1')
+    parser.add_argument('--translate', action=Stage, metavar='X,Y,Z',
+                        help='values starting with a minus sign need the '
+                             '--translate=-1,0,0 form')
+    parser.add_argument('--scale', action=Stage, metavar='S|X,Y,Z',
+                        help='uniform or per axis; negative factors mirror the mesh')
+    parser.add_argument('--rotate', action=Stage, metavar='ANGLE,AXIS',
+                        help='rotation in degrees')
+    parser.add_argument('--epsilon', type=float, default=WELD_EPSILON,
+                        help='weld distance for generated vertices')
+    parser.add_argument('--max-chord-error', type=float,
+                        help='revolutions use the fewest steps keeping the surface '
+                             'within this distance of a perfect one; an error if '
+                             'more than their STEPS are needed')
+    parser.add_argument('--normals', action='store_true',
+                        help='write smooth vertex normals (obj vn, glb NORMAL)')
+    parser.add_argument('--precision', type=int,
+                        help='decimals written per coordinate (default: exact)')
+    parser.add_argument('--format', choices=sorted(WRITERS),
+                        help='output format (default: from the output extension)')
+    args = parser.parse_args()
+
+    if not args.input.endswith('.obj'):
+        print('Error: input file must have .obj extension')
+        exit()
+
+    try:
+        format = format_of(args.out, args.format)
+    except ValueError:
+        print('Error: output must be one of: ' + ', '.join('.' + f for f in WRITERS))
+        exit()
+
+    print('\n================ MESHTOOL ================\n')
+    print('Processing ' + args.input + ' in ' + str(len(args.stages)) + ' stages ...')
+    if args.max_chord_error is not None and args.max_chord_error <= 0:
+        print('Error: max chord error must be positive')
+        exit()
+
+    try:
+        report = meshtool(args.input, args.out, args.stages, args.epsilon,
+                          args.precision, format, args.normals, args.max_chord_error)
+    except ValueError as e:
+        print('Error: ' + str(e))
+        exit()
+
+    for line in report:
+        print('> ' + line)
+    print('\nDone! Mesh saved in ' + args.out)
+    print('\n==========================================\n')
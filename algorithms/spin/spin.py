@@ -1,128 +1,73 @@
 #!/usr/bin/env python
 
 # Spin algorithm implementation
-# Usage: ./spin <input.obj> <output.obj> <steps> <angle> <X/Y/Z>
+# Usage: ./spin <input.obj> <output.obj|ply|stl|glb> <steps> <angle> <X/Y/Z> [--revolve]
 # Antonio Manjavacas
 
 
-from sys import argv
-from math import pow, sqrt, sin, cos
+import argparse
+import os
+import sys
 
-FILE_HEADER = ''
-OBJ_NAME = ''
-SMOOTH_SHADING = ''
+from math import acos, ceil, sqrt, sin, cos, radians
 
-ID_COUNTER = 1
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 
+from meshlib import load_obj, save_mesh, Mesh, MeshCache, Welder
+from meshlib.formats import WRITERS, format_of
+from meshlib.normals import signed_volume
+from meshlib.topology import (Prisms, Vector, Vertex, boundary_edges, prism_faces, to_mesh,
+                              to_objects)
+from meshlib.weld import weld_array
 
-class Vertex:
-    def __init__(self, id, x, y, z):
-        self.id = id
-        self.x = x
-        self.y = y
-        self.z = z
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-    def __str__(self):
-        return 'v' + ' ' + str(self.x) + ' ' + str(self.y) + ' ' + str(self.z)
+# Generated vertices closer than this are merged into one
+WELD_EPSILON = 1e-6
 
-    def __eq__(self, v):
-        if isinstance(v, Vertex):
-            return self.x == v.x and self.y == v.y and self.z == v.z
-        else:
-            return False
+# Part of the cache key: bump when the spun meshes change
+VERSION = 1
 
 
-class Vector:
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.module = sqrt(pow(self.x, 2) + pow(self.y, 2) + pow(self.z, 2))
+def rotation_matrix(axis, angle):
 
+    c = cos(angle)
+    s = sin(angle)
 
-class Face:
-    def __init__(self, v1, v2, v3):
-        self.v1 = v1
-        self.v2 = v2
-        self.v3 = v3
-        self.vertices = [v1, v2, v3]
-
-        a = Vector(v2.x - v1.x, v2.y - v1.y, v2.z - v1.z)
-
-        b = Vector(v3.x - v1.x, v3.y - v1.y, v3.z - v1.z)
-
-        n = Vector((a.y * b.z - a.z * b.y),
-                   (a.z * b.x - a.x * b.z),
-                   (a.x * b.y - a.y * b.x))
-
-        self.normal = Vector(n.x/n.module, n.y/n.module, n.z/n.module)
-
-    def __str__(self):
-        return 'f' + ' ' + str(self.v1.id) + ' ' + str(self.v2.id) + ' ' + str(self.v3.id)
-
-    def __eq__(self, f):
-        if isinstance(f, Face):
-            other_vertices = [f.v1, f.v2, f.v3]
-            return (self.v1 in other_vertices and
-                    self.v2 in other_vertices and
-                    self.v3 in other_vertices)
-        else:
-            return False
-
-
-def create_output(vertices, faces, output_file):
-
-    with open(output_file, 'w') as file:
-        file.write(FILE_HEADER)
-        file.write(OBJ_NAME)
-
-        for v in vertices:
-            file.write(str(v) + '\n')
-
-        file.write(SMOOTH_SHADING)
-
-        for f in faces:
-            file.write(str(f) + '\n')
-
-
-def parse_obj(obj_file):
-
-    global ID_COUNTER
-    global FILE_HEADER
-    global OBJ_NAME
-    global SMOOTH_SHADING
-
-    vertices = []
-    faces = []
-
-    with open(obj_file) as file:
-        for line in file:
-            words = line.split()
-            if words[0] == 'v':
-                vertices.append(
-                    Vertex(ID_COUNTER, float(words[1]), float(words[2]), float(words[3])))
-                ID_COUNTER += 1
-            elif words[0] == 'f':
-                v1 = [v for v in vertices if v.id == int(words[1])][0]
-                v2 = [v for v in vertices if v.id == int(words[2])][0]
-                v3 = [v for v in vertices if v.id == int(words[3])][0]
-                faces.append(Face(v1, v2, v3))
-            elif words[0] == '#':
-                FILE_HEADER += line
-            elif words[0] == 'o':
-                OBJ_NAME = line
-            elif words[0] == 's':
-                SMOOTH_SHADING = line
-
-    return vertices, faces
+    if axis == 'X':
+        # X axis rotation
+        return [[1, 0, 0, 0],
+                [0, c, -s, 0],
+                [0, s, c, 0],
+                [0, 0, 0, 1]]
+    elif axis == 'Y':
+        # Y axis rotation
+        return [[c, 0, s, 0],
+                [0, 1, 0, 0],
+                [-s, 0, c, 0],
+                [0, 0, 0, 1]]
+    else:
+        # Z axis rotation
+        return [[c, -s, 0, 0],
+                [s, c, 0, 0],
+                [0, 0, 1, 0],
+                [0, 0, 0, 1]]
 
 
-def apply_spin(vertices, faces, steps, total_angle, axis):
-    global ID_COUNTER
+def apply_spin(vertices, faces, steps, total_angle, axis, welder=None,
+               unique_walls=False):
+    if welder is None:
+        welder = Welder(WELD_EPSILON)
 
     new_vertices = []
     new_faces = []
 
+    # Frontal faces and side walls, without repeating vertex sets
+    prisms = Prisms(unique_walls)
+
     # Divide the angle depending on the number of steps
     angle_step = int(total_angle/steps)
 
@@ -130,11 +75,13 @@ def apply_spin(vertices, faces, steps, total_angle, axis):
 
         angle = angle_step * i
 
+        # Rotation matrix, shared by every face of this step
+        R = rotation_matrix(axis, angle)
+
         for face in faces:
 
             # Get triangle center
-            center = Vertex(None,
-                            (face.v1.x + face.v2.x + face.v3.x)/3,
+            center = Vertex((face.v1.x + face.v2.x + face.v3.x)/3,
                             (face.v1.y + face.v2.y + face.v3.y)/3,
                             (face.v1.z + face.v2.z + face.v3.z)/3)
 
@@ -154,26 +101,6 @@ def apply_spin(vertices, faces, steps, total_angle, axis):
                   [0, 0, 1, t2.z],
                   [0, 0, 0, 1]]
 
-            # Rotation matrix
-            if axis == 'X':
-                # X axis rotation
-                R = [[1, 0, 0, 0],
-                     [0, cos(angle), -sin(angle), 0],
-                     [0, sin(angle), cos(angle), 0],
-                     [0, 0, 0, 1]]
-            elif axis == 'Y':
-                # Y axis rotation
-                R = [[cos(angle), 0, sin(angle), 0],
-                     [0, 1, 0, 0],
-                     [-sin(angle), 0, cos(angle), 0],
-                     [0, 0, 0, 1]]
-            else:
-                # Z axis rotation
-                R = [[cos(angle), -sin(angle), 0, 0],
-                     [sin(angle), cos(angle), 0, 0],
-                     [0, 0, 1, 0],
-                     [0, 0, 0, 1]]
-
             # Transformation matrix: TM = T2 * R * T
             TM = mult_matrix(T2, mult_matrix(R, T))
 
@@ -190,44 +117,192 @@ def apply_spin(vertices, faces, steps, total_angle, axis):
                         new_vertex_coords[i] += TM[i][j] * vertex[j]
 
                 new_vertex = Vertex(
-                    None, new_vertex_coords[0], new_vertex_coords[1], new_vertex_coords[2])
+                    new_vertex_coords[0], new_vertex_coords[1], new_vertex_coords[2])
 
-                # Check if the vertex was already created
-                if new_vertex not in new_vertices:
-                    new_vertex.id = ID_COUNTER
-                    ID_COUNTER += 1
+                # Reuse the vertex if one was already created at this position
+                welded_vertex = welder.weld(
+                    new_vertex.x, new_vertex.y, new_vertex.z, new_vertex)
+                if welded_vertex is new_vertex:
                     new_vertices.append(new_vertex)
                 else:
-                    new_vertex = [
-                        v for v in new_vertices if v == new_vertex][0]
+                    new_vertex = welded_vertex
 
                 new_face_vertices.append(new_vertex)
 
             # GENERATE NEW FACES
-            v1 = face.v1
-            v2 = face.v2
-            v3 = face.v3
-
-            new_v1 = new_face_vertices[0]
-            new_v2 = new_face_vertices[1]
-            new_v3 = new_face_vertices[2]
-
-            # New frontal face
-            new_face = Face(new_v1, new_v2, new_v3)
-            if new_face not in new_faces:
-                new_faces.append(new_face)
-
-            # Additional lateral faces
-            new_faces.append(Face(v1, v2, new_v2))
-            new_faces.append(Face(v1, new_v1, new_v2))
-            new_faces.append(Face(v2, v3, new_v3))
-            new_faces.append(Face(v2, new_v2, new_v3))
-            new_faces.append(Face(v1, v3, new_v3))
-            new_faces.append(Face(v1, new_v1, new_v3))
+            new_faces += prisms.faces(face, new_face_vertices)
 
     return new_vertices, new_faces
 
 
+def apply_spin_vectorized(mesh, steps, total_angle, axis, epsilon=WELD_EPSILON,
+                          unique_walls=False):
+
+    # Same result as apply_spin. The rotation of each step is computed once
+    # and applied to the corners of every face as one batched product; the
+    # connecting faces are built from vertex indices. Returns the spun mesh
+    # and the welded vertex count.
+
+    positions = mesh.positions_view()
+    faces = mesh.faces_view().astype(np.int64)
+    vertex_count = len(positions)
+    face_count = len(faces)
+
+    angle_step = int(total_angle/steps)
+
+    if face_count == 0 or angle_step < 1:
+        return mesh, 0
+
+    # (F, 3, 3) array with the corners of every triangle
+    corners = positions[faces]
+    x, y, z = corners[:, :, 0], corners[:, :, 1], corners[:, :, 2]
+
+    # Every face rotates about its own center: TM = T2 * R * T
+    center = (corners[:, 0] + corners[:, 1] + corners[:, 2])/3
+    t = 0.0 - center
+    t2 = -t
+
+    rings = []
+
+    for i in range(1, angle_step + 1):
+
+        R = rotation_matrix(axis, angle_step * i)
+
+        # Translation column of TM for every face, then TM * v for every
+        # corner. Terms are summed in the same order as mult_matrix so the
+        # result matches the per-face algorithm exactly.
+        ring = np.empty_like(corners)
+        for row in range(3):
+            r0, r1, r2 = R[row][0], R[row][1], R[row][2]
+            offset = (0.0 + (((0.0 + r0 * t[:, 0]) + r1 * t[:, 1])
+                             + r2 * t[:, 2])) + t2[:, row]
+            ring[:, :, row] = (((0.0 + r0 * x) + r1 * y) + r2 * z) \
+                + offset[:, None]
+        rings.append(ring)
+
+    # GENERATE NEW VERTICES
+    moved = np.concatenate(rings).reshape(-1, 3)
+    first, inverse = weld_array(moved, epsilon)
+
+    new_positions = moved[first]
+    new_ids = (vertex_count + inverse).reshape(-1, 3)
+    welded = len(moved) - len(first)
+
+    # GENERATE NEW FACES
+    # Ring k holds faces k*F ... (k+1)*F - 1, each connected back to the
+    # original face with the same index
+    new_faces = prism_faces(np.tile(faces, (angle_step, 1)), new_ids, unique_walls)
+
+    result = Mesh.from_numpy(np.concatenate([positions, new_positions]),
+                             np.concatenate([faces, new_faces]))
+    result.header = mesh.header
+    result.name = mesh.name
+    result.smoothing = mesh.smoothing
+
+    return result, welded
+
+
+def apply_revolution(mesh, steps, total_angle, axis, pivot=(0.0, 0.0, 0.0),
+                     epsilon=WELD_EPSILON):
+
+    # Surface of revolution: the whole profile rotates about the axis that
+    # goes through 'pivot'. Ring k is the profile rotated k * total_angle /
+    # steps degrees and its vertices are shared by the bands on both sides.
+    # A full turn closes back onto ring 0 and vertices lying on the axis
+    # are shared by every ring. Returns the new mesh and the number of
+    # vertices saved by sharing axis vertices.
+
+    vertex_count = mesh.vertex_count
+    closed = abs(abs(total_angle) - 360) < 1e-9
+    rings = steps if closed else steps + 1
+    angle_step = radians(total_angle) / steps
+
+    # Profile edges: explicit polylines, otherwise the outline of the faces
+    edges = list(mesh.line_tuples()) or boundary_edges(mesh)
+
+    # Vertices on the rotation axis are not copied into new rings
+    a = 'XYZ'.index(axis)
+    on_axis = []
+    for p in mesh.vertices():
+        d = [p[i] - pivot[i] for i in range(3) if i != a]
+        on_axis.append(sqrt(d[0] * d[0] + d[1] * d[1]) <= epsilon)
+    moving = [v for v in range(vertex_count) if not on_axis[v]]
+    slot = [0] * vertex_count
+    for i, v in enumerate(moving):
+        slot[v] = i
+
+    def ring_index(k, v):
+        k %= rings
+        if k == 0 or on_axis[v]:
+            return v
+        return vertex_count + (k - 1) * len(moving) + slot[v]
+
+    result = Mesh()
+    result.header = mesh.header
+    result.name = mesh.name
+    result.smoothing = mesh.smoothing
+    result.positions.extend(mesh.positions)
+
+    # GENERATE NEW VERTICES: one rotation per ring for the whole profile
+    if np is not None:
+        x, y, z = (mesh.positions_view()[moving] - pivot).T
+        ring = np.empty((len(moving), 3))
+        for k in range(1, rings):
+            R = rotation_matrix(axis, k * angle_step)
+            for i in range(3):
+                ring[:, i] = R[i][0] * x + R[i][1] * y + R[i][2] * z + pivot[i]
+            result.positions.frombytes(ring.tobytes())
+    else:
+        profile = [mesh.vertex(v) for v in moving]
+        for k in range(1, rings):
+            R = rotation_matrix(axis, k * angle_step)
+            for x, y, z in profile:
+                x, y, z = x - pivot[0], y - pivot[1], z - pivot[2]
+                result.positions.extend(
+                    R[i][0] * x + R[i][1] * y + R[i][2] * z + pivot[i]
+                    for i in range(3))
+
+    # GENERATE NEW FACES: a band of two triangles per profile edge between
+    # consecutive rings, skipping those collapsed onto the axis
+    faces = result.faces
+    if np is not None and edges:
+        ids = np.tile(np.arange(vertex_count), (rings, 1))
+        ids[1:, moving] = (vertex_count + len(moving) * np.arange(rings - 1)[:, None]
+                           + np.arange(len(moving)))
+        e = np.array(edges, dtype=np.int64)
+        k = np.arange(steps)[:, None]
+        a1, a2 = ids[k, e[:, 0]], ids[k, e[:, 1]]
+        b1, b2 = ids[(k + 1) % rings, e[:, 0]], ids[(k + 1) % rings, e[:, 1]]
+        band = np.stack([np.stack([a1, b1, a2], axis=-1),
+                         np.stack([a2, b1, b2], axis=-1)], axis=2)
+        keep = np.stack([a1 != b1, a2 != b2], axis=2)
+        faces.frombytes(band[keep].astype(np.uint32).tobytes())
+    else:
+        for k in range(steps):
+            for v1, v2 in edges:
+                a1, a2 = ring_index(k, v1), ring_index(k, v2)
+                b1, b2 = ring_index(k + 1, v1), ring_index(k + 1, v2)
+                if a1 != b1:
+                    faces.extend((a1, b1, a2))
+                if a2 != b2:
+                    faces.extend((a2, b1, b2))
+
+    # Open sweeps keep the profile as start cap and add a reversed end cap
+    if not closed:
+        faces.extend(mesh.faces)
+        for face in mesh.face_tuples():
+            faces.extend(ring_index(steps, v) for v in reversed(face))
+
+    # Bands run against the profile edges, so they agree with the caps.
+    # Whether that faces outwards depends on the side the profile sweeps
+    # to: a face profile gives a solid, turned around if inside out.
+    if mesh.face_count and signed_volume(result) < 0:
+        for i in range(0, len(faces), 3):
+            faces[i + 1], faces[i + 2] = faces[i + 2], faces[i + 1]
+
+    return result, (rings - 1) * (vertex_count - len(moving))
+
+
 def mult_matrix (A, B):
     rows_A = len(A)
     cols_A = len(A[0])
@@ -243,45 +318,186 @@ def mult_matrix (A, B):
     return C
 
 
-def spin(input_file, output_file, steps, angle, axis):
+def chord_steps(mesh, total_angle, axis, max_error, pivot=(0.0, 0.0, 0.0)):
+
+    # Fewest revolution steps keeping every band within max_error of the
+    # true surface. A chord spanning an angle t on a circle of radius r
+    # is r * (1 - cos(t / 2)) away from the arc at most, so the farthest
+    # vertex from the axis sets the step. As this error does not depend
+    # on where the chord starts, evenly spaced rings are already optimal.
+    a = 'XYZ'.index(axis)
+    radius = 0.0
+    for p in mesh.vertices():
+        d = [p[i] - pivot[i] for i in range(3) if i != a]
+        radius = max(radius, sqrt(d[0] * d[0] + d[1] * d[1]))
+
+    # A closed surface needs three rings at least
+    closed = abs(abs(total_angle) - 360) < 1e-9
+    least = 3 if closed else 1
+    if radius == 0:
+        return least
+
+    step = 2 * acos(max(-1.0, 1 - max_error / radius))
+    return max(least, ceil(radians(abs(total_angle)) / step - 1e-9))
+
 
-    # Get data from .obj file
-    vertices, faces = parse_obj(input_file)
+def bounded_steps(mesh, steps, total_angle, axis, max_error, pivot=(0.0, 0.0, 0.0)):
+
+    # Steps meeting max_error, with 'steps' as the most allowed. A cap too
+    # low to meet it is an error rather than a coarser surface.
+    needed = chord_steps(mesh, total_angle, axis, max_error, pivot)
+    if needed > steps:
+        raise ValueError(str(needed) + ' steps are needed for a max chord error of '
+                         + str(max_error) + ', more than the ' + str(steps) + ' given')
+    return needed
+
+
+def spin_mesh(mesh, steps, angle, axis, epsilon=WELD_EPSILON, revolve=False,
+              pivot=(0.0, 0.0, 0.0), unique_walls=False):
+
+    # Spun copy of 'mesh' and the welded (or shared) vertex count
+    if revolve:
+        return apply_revolution(mesh, steps, angle, axis, pivot, epsilon)
+
+    if np is not None:
+        return apply_spin_vectorized(mesh, steps, angle, axis, epsilon, unique_walls)
+
+    # Pure-Python fallback when NumPy is not installed
+    vertices, faces = to_objects(mesh)
 
     # Apply spin
-    new_vertices, new_faces = apply_spin(vertices, faces, steps, angle, axis)
+    welder = Welder(epsilon)
+    new_vertices, new_faces = apply_spin(
+        vertices, faces, steps, angle, axis, welder, unique_walls)
 
     vertices += new_vertices
     faces += new_faces
 
-    # Generate new .obj file
-    create_output(vertices, faces, output_file)
+    return to_mesh(vertices, faces, mesh), welder.welded
+
+
+def spin(input_file, output_file, steps, angle, axis, epsilon=WELD_EPSILON,
+         revolve=False, pivot=(0.0, 0.0, 0.0), precision=None, format=None,
+         normals=False, unique_walls=False, cache=None, max_chord_error=None):
+
+    # With max_chord_error (revolve mode) 'steps' is only an upper bound:
+    # the fewest steps meeting the tolerance are used. They depend on the
+    # profile, so this path always loads it, cached result or not. Returns
+    # the welded vertex count and the steps used.
+    mesh = None
+    if revolve and max_chord_error is not None:
+        mesh = load_obj(input_file)
+        steps = bounded_steps(mesh, steps, angle, axis, max_chord_error, pivot)
+
+    def build():
+        # Get data from .obj file
+        profile = mesh if mesh is not None else load_obj(input_file)
+        return spin_mesh(profile, steps, angle, axis, epsilon, revolve, pivot,
+                         unique_walls)
+
+    def save(result):
+        # Generate new mesh file
+        save_mesh(output_file, result, format, precision=precision, normals=normals)
+
+    if cache is None:
+        result, welded = build()
+        save(result)
+        return welded, steps
+
+    # A result cached for the same input and parameters is written
+    # without spinning anything, and without loading the input unless
+    # max_chord_error already did
+    key = cache.key(input_file, 'spin', VERSION, steps=steps, angle=angle,
+                    axis=axis, epsilon=epsilon, revolve=revolve,
+                    pivot=tuple(pivot), unique_walls=unique_walls)
+    return cache.run(key, build, save), steps
 
 
 if __name__ == '__main__':
-    if len(argv) != 6:
-        print('Usage: ./spin <input.obj> <output.obj> <steps> <angle> <axis>')
+    parser = argparse.ArgumentParser(
+        usage='./spin <input.obj> <output.obj|ply|stl|glb> <steps> <angle> <axis> [weld epsilon] '
+              '[--revolve] [--pivot X,Y,Z] [--unique-walls] [--normals] [--precision N] '
+              '[--format F] [--cache [DIR]] [--cache-size MB] [--max-chord-error E]')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('steps')
+    parser.add_argument('angle')
+    parser.add_argument('axis')
+    parser.add_argument('epsilon', nargs='?', default=str(WELD_EPSILON))
+    parser.add_argument('--revolve', action='store_true',
+                        help='rotate the whole profile, sharing vertices between rings')
+    parser.add_argument('--pivot', default='0,0,0',
+                        help='point the rotation axis goes through (revolve mode)')
+    parser.add_argument('--unique-walls', action='store_true',
+                        help='build side walls shared by neighbouring faces only once')
+    parser.add_argument('--normals', action='store_true',
+                        help='write smooth vertex normals (obj vn, glb NORMAL)')
+    parser.add_argument('--precision', type=int,
+                        help='decimals written per coordinate (default: exact)')
+    parser.add_argument('--format', choices=sorted(WRITERS),
+                        help='output format (default: from the output extension)')
+    parser.add_argument('--max-chord-error', type=float,
+                        help='revolve mode: use the fewest steps keeping the surface '
+                             'within this distance of a perfect revolution; an error '
+                             'if more than <steps> are needed')
+    parser.add_argument('--cache', nargs='?', const='',
+                        help='reuse results of previous runs stored in DIR '
+                             '(default: $MESHLIB_CACHE or ~/.cache/meshlib)')
+    parser.add_argument('--cache-size', type=float, default=1024,
+                        help='cache size limit in MB (default: 1024)')
+    args = parser.parse_args()
+
+    if not args.input.endswith('.obj'):
+        print('Error: input file must have .obj extension')
+        exit()
+
+    try:
+        format = format_of(args.output, args.format)
+    except ValueError:
+        print('Error: output must be one of: ' + ', '.join('.' + f for f in WRITERS))
+        exit()
+
+    try:
+        steps = int(args.steps)
+        angle = float(args.angle)
+        epsilon = float(args.epsilon)
+        pivot = tuple(float(c) for c in args.pivot.split(','))
+    except:
+        print('Error: step, angle, epsilon and pivot arguments must be numbers')
+        exit()
+
+    if len(pivot) != 3:
+        print('Error: pivot must have three coordinates')
         exit()
-    elif argv[1].endswith('.obj') and argv[2].endswith('.obj'):
-        try:
-            steps = int(argv[3])
-            angle = float(argv[4])
-        except:
-            print('Error: step and angle arguments must be numbers')
-            exit()
-
-        if argv[5] in ['X', 'Y', 'Z']:
-            axis = argv[5]
-        else:
-            print('Error: axis argument must be one of the following: X, Y ,Z')
-            exit()
-
-        print('\n================ SPIN ================\n')
-        print('Spinning ' + argv[1] + '...\n> Steps: ' + str(steps) +
-              '\n> Angle: ' + str(angle) + '\n> Axis: ' + str(axis))
-        spin(argv[1], argv[2], steps, angle, axis)
-        print('\nDone! Mesh saved in ' + argv[2])
-        print('\n======================================\n')
+
+    if args.axis in ['X', 'Y', 'Z']:
+        axis = args.axis
     else:
-        print('Error: input and output files must have .obj extension')
+        print('Error: axis argument must be one of the following: X, Y ,Z')
+        exit()
+
+    if args.max_chord_error is not None and (not args.revolve or args.max_chord_error <= 0):
+        print('Error: max chord error must be positive and used with --revolve')
+        exit()
+
+    cache = None
+    if args.cache is not None:
+        cache = MeshCache(args.cache or None, int(args.cache_size * 1e6))
+
+    print('\n================ SPIN ================\n')
+    print('Spinning ' + args.input + '...\n> Angle: ' + str(angle) + '\n> Axis: ' + str(axis))
+    if args.max_chord_error is not None:
+        print('> Max chord error: ' + str(args.max_chord_error))
+    try:
+        welded, steps = spin(args.input, args.output, steps, angle, axis, epsilon,
+                             args.revolve, pivot, args.precision, format, args.normals,
+                             args.unique_walls, cache, args.max_chord_error)
+    except ValueError as e:
+        print('Error: ' + str(e))
         exit()
+    print('> Steps: ' + str(steps))
+    print('> Welded vertices: ' + str(welded))
+    if cache is not None:
+        print('> Cache: ' + ('hit' if cache.hits else 'miss'))
+    print('\nDone! Mesh saved in ' + args.output)
+    print('\n======================================\n')
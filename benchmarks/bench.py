@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks for the OBJ pipeline.
+
+Every stage runs on synthetic inputs at several sizes. The best time of
+a few repetitions is reported together with the throughput and the peak
+memory allocated by Python (tracemalloc, measured in a separate run so
+it does not slow down the timed ones). Results can be saved as JSON and
+compared against those of another commit.
+
+Usage:
+    python3 benchmarks/bench.py [--sizes 1000,10000,100000] [--stages load_obj,extrude]
+                                [--repeat 3] [--out results.json]
+                                [--compare base.json] [--threshold 0.1]
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BARPLOT = os.path.join(ROOT, 'final-project', 'src')
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BARPLOT)
+
+import generators
+
+from meshlib import load_obj, save_obj, save_mesh, Welder
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_SIZES = '1000,10000,100000'
+
+# Spin steps: the legacy algorithm makes total_angle / steps copies
+SPIN_STEPS = 120
+
+# Rings of the surface of revolution
+REVOLVE_STEPS = 64
+
+
+def load_module(name, path):
+
+    # Scripts are not packages, and 3Dbarplot is not even a valid name
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+extrude = load_module('extrude', 'algorithms/extrude/extrude.py')
+spin = load_module('spin', 'algorithms/spin/spin.py')
+decimate = load_module('decimate', 'algorithms/decimate/decimate.py')
+
+
+# name -> (setup, unit, largest size or None). setup(size, tmp) prepares
+# the inputs and returns a function that runs the stage once and returns
+# (items processed, bytes read or written).
+STAGES = {}
+
+
+def stage(name, unit='faces', limit=None):
+    def register(setup):
+        STAGES[name] = (setup, unit, limit)
+        return setup
+    return register
+
+
+@stage('load_obj')
+def bench_load_obj(size, tmp):
+    path = os.path.join(tmp, 'load.obj')
+    save_obj(generators.sphere(size), path)
+
+    def run():
+        mesh = load_obj(path)
+        return mesh.face_count, os.path.getsize(path)
+    return run
+
+
+@stage('load_obj_parallel')
+def bench_load_obj_parallel(size, tmp):
+    path = os.path.join(tmp, 'load.obj')
+    save_obj(generators.sphere(size), path)
+
+    # Byte ranges parsed by one process per core
+    def run():
+        mesh = load_obj(path, workers=os.cpu_count())
+        return mesh.face_count, os.path.getsize(path)
+    return run
+
+
+@stage('save_obj')
+def bench_save_obj(size, tmp):
+    mesh = generators.sphere(size)
+    path = os.path.join(tmp, 'save.obj')
+
+    def run():
+        save_obj(mesh, path)
+        return mesh.face_count, os.path.getsize(path)
+    return run
+
+
+@stage('save_glb')
+def bench_save_glb(size, tmp):
+    mesh = generators.sphere(size)
+    path = os.path.join(tmp, 'save.glb')
+
+    def run():
+        save_mesh(path, mesh)
+        return mesh.face_count, os.path.getsize(path)
+    return run
+
+
+@stage('extrude')
+def bench_extrude(size, tmp):
+    mesh = generators.sphere(size)
+
+    # Same path as extrude.extrude: vectorized when NumPy is installed
+    def run():
+        if extrude.np is None:
+            return extrude_objects(mesh), 0
+        mesh.invalidate()
+        result, welded = extrude.apply_extrusion_vectorized(mesh, 0.1)
+        return result.face_count, 0
+    return run
+
+
+def extrude_objects(mesh):
+    vertices, faces = extrude.to_objects(mesh)
+    new_vertices, new_faces = extrude.apply_extrusion(vertices, faces, 0.1, Welder())
+    return len(faces) + len(new_faces)
+
+
+# Pure-Python extrusion, also used when NumPy is missing
+@stage('extrude_objects')
+def bench_extrude_objects(size, tmp):
+    mesh = generators.sphere(size)
+    return lambda: (extrude_objects(mesh), 0)
+
+
+@stage('extrude_region')
+def bench_extrude_region(size, tmp):
+    mesh = generators.sphere(size)
+
+    def run():
+        mesh.invalidate()
+        result, boundary = extrude.apply_region_extrusion(mesh, 0.1)
+        return result.face_count, 0
+    return run
+
+
+@stage('spin')
+def bench_spin(size, tmp):
+
+    # Input sized so the output has about 'size' faces
+    angle = 360
+    copies = angle // SPIN_STEPS
+    mesh = generators.grid(max(2, size // (1 + 7 * copies)))
+
+    def run():
+        if spin.np is None:
+            return spin_objects(mesh, angle), 0
+        result, welded = spin.apply_spin_vectorized(mesh, SPIN_STEPS, angle, 'Y')
+        return result.face_count, 0
+    return run
+
+
+def spin_objects(mesh, angle):
+    vertices, faces = spin.to_objects(mesh)
+    new_vertices, new_faces = spin.apply_spin(vertices, faces, SPIN_STEPS, angle, 'Y',
+                                              Welder())
+    return len(faces) + len(new_faces)
+
+
+@stage('revolve')
+def bench_revolve(size, tmp):
+    mesh = generators.profile(max(2, size // (2 * REVOLVE_STEPS) + 1))
+
+    def run():
+        result, shared = spin.apply_revolution(mesh, REVOLVE_STEPS, 360, 'Y')
+        return result.face_count, 0
+    return run
+
+
+@stage('decimate', limit=100000)
+def bench_decimate(size, tmp):
+    mesh = generators.sphere(size)
+
+    def run():
+        decimator = decimate.Decimator(mesh)
+        decimator.run(mesh.face_count // 4)
+        return mesh.face_count, 0
+    return run
+
+
+def barplot():
+
+    # Imported on first use: glyphs and materials are found relative to
+    # final-project/src, which must be the working directory
+    if 'barplot' not in sys.modules:
+        sys.modules['barplot'] = load_module('barplot', 'final-project/src/3Dbarplot.py')
+    return sys.modules['barplot']
+
+
+def countries_csv(size, tmp):
+
+    # 'size' is a number of output faces; a country makes about 50
+    path = os.path.join(tmp, 'countries.csv')
+    generators.countries_csv(path, max(1, size // 50))
+    return path
+
+
+@stage('parse_csv', unit='rows')
+def bench_parse_csv(size, tmp):
+    path = countries_csv(size, tmp)
+
+    def run():
+        countries = barplot().parse_csv(path)
+        return len(countries), os.path.getsize(path)
+    return run
+
+
+@stage('plot_countries', unit='countries')
+def bench_plot_countries(size, tmp):
+    module = barplot()
+    countries = module.parse_csv(countries_csv(size, tmp))
+
+    def run():
+        module.plot_countries(countries, module.Bars(module.WIDTH))
+        return len(countries), 0
+    return run
+
+
+@stage('save_scene')
+def bench_save_scene(size, tmp):
+    module = barplot()
+    countries = module.parse_csv(countries_csv(size, tmp))
+    bars = module.Bars(module.WIDTH)
+    scene = module.build_scene(countries, module.plot_countries(countries, bars), bars)
+    path = os.path.join(tmp, 'scene.obj')
+
+    # Faces written, counted once outside the timed runs
+    module.save_obj(path, scene)
+    with open(path, 'rb') as f:
+        faces = sum(1 for line in f if line.startswith(b'f '))
+
+    def run():
+        module.save_obj(path, scene)
+        return faces, os.path.getsize(path)
+    return run
+
+
+def measure(run, repeat):
+
+    # Best time of 'repeat' runs, then the peak memory of one more
+    best = None
+    for i in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        items, size = run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, items, size, peak
+
+
+def run_benchmarks(stages, sizes, repeat):
+
+    results = []
+    tmp = tempfile.mkdtemp(prefix='bench-')
+    cwd = os.getcwd()
+    os.chdir(BARPLOT)
+
+    try:
+        for name in stages:
+            setup, unit, limit = STAGES[name]
+            for size in sizes:
+                if limit is not None and size > limit:
+                    continue
+                seconds, items, size_bytes, peak = measure(setup(size, tmp), repeat)
+                record = {
+                    'stage': name,
+                    'size': size,
+                    'seconds': seconds,
+                    'items': items,
+                    'unit': unit,
+                    'items_per_s': items / seconds if seconds else None,
+                    'bytes': size_bytes,
+                    'mb_per_s': size_bytes / seconds / 1e6 if seconds and size_bytes else None,
+                    'peak_mb': peak / 1e6,
+                }
+                results.append(record)
+                print_record(record)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp)
+
+    return results
+
+
+def print_record(r):
+    rate = '%12.0f %-9s' % (r['items_per_s'] or 0, r['unit'] + '/s')
+    mb = '%8.1f MB/s' % r['mb_per_s'] if r['mb_per_s'] else ' ' * 13
+    print('%-18s %8d %10.4f s %s %s %9.1f MB peak'
+          % (r['stage'], r['size'], r['seconds'], rate, mb, r['peak_mb']))
+
+
+def metadata():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                         cwd=ROOT, stderr=subprocess.DEVNULL)
+        commit = commit.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__ if np is not None else None,
+        'platform': platform.platform(),
+    }
+
+
+def compare(results, base_file, threshold):
+
+    # Prints the time ratio of every stage measured in both runs. Returns
+    # the number of stages slower than the base by more than 'threshold'.
+    with open(base_file) as f:
+        base = json.load(f)
+
+    previous = {(r['stage'], r['size']): r for r in base['results']}
+    regressions = 0
+
+    print('\nCompared with ' + base_file + ' (commit ' + str(base.get('commit')) + ')')
+    for r in results:
+        old = previous.get((r['stage'], r['size']))
+        if old is None or not old['seconds']:
+            continue
+        ratio = r['seconds'] / old['seconds']
+        slower = ratio > 1 + threshold
+        regressions += slower
+        print('%-18s %8d %10.4f s -> %10.4f s  x%.2f%s'
+              % (r['stage'], r['size'], old['seconds'], r['seconds'], ratio,
+                 '  REGRESSION' if slower else ''))
+
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        usage='bench.py [--sizes N,N,...] [--stages S,S,...] [--repeat R] '
+              '[--out FILE] [--compare FILE] [--threshold T]')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help='approximate face counts (default: ' + DEFAULT_SIZES + ')')
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help='comma separated stages, from: ' + ', '.join(STAGES))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs per measurement, the best is kept')
+    parser.add_argument('--out', help='save the results as JSON')
+    parser.add_argument('--compare', help='JSON results of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown reported as a regression (default: 0.1, 10%%)')
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(s) for s in args.sizes.split(',')]
+    except ValueError:
+        print('Error: sizes must be integers')
+        exit(2)
+
+    stages = args.stages.split(',')
+    for name in stages:
+        if name not in STAGES:
+            print('Error: unknown stage ' + name)
+            exit(2)
+
+    info = metadata()
+    print('commit %s, Python %s, NumPy %s\n' % (info['commit'], info['python'], info['numpy']))
+
+    results = run_benchmarks(stages, sizes, max(1, args.repeat))
+
+    if args.out:
+        info['results'] = results
+        with open(args.out, 'w') as f:
+            json.dump(info, f, indent=1)
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        exit(1)
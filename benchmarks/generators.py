@@ -0,0 +1,111 @@
+"""
+Synthetic inputs for the benchmarks.
+
+Every generator is deterministic for a given size, so results taken at
+different commits measure the same work.
+"""
+
+import os
+import random
+import sys
+
+from math import cos, pi, sin, sqrt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from meshlib import Mesh
+
+
+def grid(triangles):
+
+    # Wavy k x k grid of quads split in two, about 'triangles' faces
+
+    k = max(1, int(sqrt(triangles / 2)))
+    mesh = Mesh()
+    mesh.name = 'Grid'
+    mesh.smoothing = 'off'
+
+    for i in range(k + 1):
+        for j in range(k + 1):
+            mesh.positions.extend((i * 0.1, sin(i * 0.3) * cos(j * 0.2), j * 0.1))
+
+    for i in range(k):
+        for j in range(k):
+            a = i * (k + 1) + j
+            b, c = a + 1, a + k + 1
+            mesh.faces.extend((a, c, b, b, c, c + 1))
+
+    return mesh
+
+
+def sphere(triangles):
+
+    # Closed UV sphere of radius 1 with about 'triangles' faces
+
+    rings = max(2, int(sqrt(triangles / 4)))
+    segments = 2 * rings
+    mesh = Mesh()
+    mesh.name = 'Sphere'
+
+    mesh.positions.extend((0.0, 1.0, 0.0))
+    for r in range(1, rings):
+        theta = pi * r / rings
+        for s in range(segments):
+            phi = 2 * pi * s / segments
+            mesh.positions.extend((sin(theta) * cos(phi), cos(theta), sin(theta) * sin(phi)))
+    mesh.positions.extend((0.0, -1.0, 0.0))
+
+    bottom = mesh.vertex_count - 1
+
+    def ring(r, s):
+        return 1 + (r - 1) * segments + s % segments
+
+    for s in range(segments):
+        mesh.faces.extend((0, ring(1, s + 1), ring(1, s)))
+    for r in range(1, rings - 1):
+        for s in range(segments):
+            a, b = ring(r, s), ring(r, s + 1)
+            c, d = ring(r + 1, s), ring(r + 1, s + 1)
+            mesh.faces.extend((a, b, d, a, d, c))
+    for s in range(segments):
+        mesh.faces.extend((bottom, ring(rings - 1, s), ring(rings - 1, s + 1)))
+
+    return mesh
+
+
+def profile(points):
+
+    # Open vase-like polyline in the XY plane, for surfaces of revolution
+
+    mesh = Mesh()
+    mesh.name = 'Profile'
+    for i in range(points):
+        t = i / max(1, points - 1)
+        mesh.positions.extend((0.5 + 0.3 * sin(6 * t), t, 0.0))
+    for i in range(points - 1):
+        mesh.lines.extend((i, i + 1))
+
+    return mesh
+
+
+def countries_csv(path, countries, seed=0):
+
+    # country,cases,deaths,recovered rows with distinct letter-only names
+
+    rng = random.Random(seed)
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+    with open(path, 'w') as f:
+        f.write('country,cases,deaths,recovered\n')
+        for i in range(countries):
+            # base-26 number followed by random letters keeps names unique
+            name = ''
+            n = i
+            while True:
+                name += letters[n % 26]
+                n //= 26
+                if n == 0:
+                    break
+            name += ''.join(rng.choice(letters) for k in range(rng.randint(2, 8)))
+            f.write('%s,%d,%d,%d\n' % (name.capitalize(), rng.randint(0, 10 ** 6),
+                                       rng.randint(0, 10 ** 5), rng.randint(0, 10 ** 6)))
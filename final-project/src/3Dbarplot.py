@@ -6,11 +6,22 @@ Final Project. Antonio Manjavacas.
 3D Barplot generator aimed to ease COVID-19 data visualization.
 """
 
+import argparse
 import csv
-
-from sys import argv
-
-from utils import Vertex, Face, Letter_face, Tag, Bar
+import io
+import json
+import os
+
+from array import array
+from multiprocessing import Pool
+
+from utils import Vertex, Letter_face, Tag, LodGroup, Bars, Scene, BAR_CORNERS, BAR_FACES
+from utils import COLOR_CASES, COLOR_DEATHS, COLOR_RECOVERED
+from glyphs import GlyphAtlas
+from ingest import read_header, read_table, AGGREGATES
+from animation import save_frames, save_animation
+from meshlib import Mesh, ObjWriter, save_mesh, load_mtl
+from meshlib.formats import WRITERS, GlbBuilder, format_of
 from country import Country
 
 
@@ -19,6 +30,10 @@ PATH_LEGEND_LETTERS = './letters/legend/'
 PATH_MATERIALS = '../resources/materials/colors.mtl'
 PATH_OUTPUT = '../output/'
 
+# letter meshes, each read from disk the first time it is used
+COUNTRY_GLYPHS = GlyphAtlas(PATH_COUNTRY_LETTERS)
+LEGEND_GLYPHS = GlyphAtlas(PATH_LEGEND_LETTERS)
+
 SCALE = 1000 # scale factor
 
 COUNTRY_SEPARATION = 30 # distance between countries
@@ -28,36 +43,101 @@ LEGEND_SEPARATION = 30 # separation between legend and bars
 
 WIDTH = 10 # bar width
 
+FRAME_RATE = 10 # animation frames per second
+
 FIRST_LEGEND = 'CASES'
 SECOND_LEGEND = 'DEATHS'
 THIRD_LEGEND = 'RECOVERED'
 
 
 """
-Gets the list of countries and their stats from .csv file
+Gets the list of countries and their stats from .csv file. 'metrics'
+names the cases, deaths and recovered columns (by default the three
+columns after the country) and rows of a repeated country are combined
+with 'aggregate'.
+"""
+def parse_csv(csv_file, metrics=None, aggregate='last'):
+
+    if metrics is None:
+        metrics = read_header(csv_file)[1:4]
+
+    table = read_table(csv_file, metrics, aggregate=aggregate)
+
+    if len(table.metrics) < 3:
+        raise ValueError('expected cases, deaths and recovered columns in ' + csv_file)
+
+    cases, deaths, recovered = list(table.metrics.values())[:3]
+
+    return [Country(name=name,
+                    cases=cases[i]/SCALE,
+                    deaths=deaths[i]/SCALE,
+                    recovered=recovered[i]/SCALE)
+            for i, name in enumerate(table.keys)]
+
+"""
+Checks whether a .csv file holds daily history (date,country,...)
+"""
+def is_series(csv_file):
+
+    with open(csv_file, 'r') as f:
+        header = next(csv.reader(f, delimiter=','), [])
+
+    return bool(header) and header[0].strip().lower() == 'date'
+
+"""
+Gets the dates and, for each date, the stats of every country from a
+long-format .csv file. Countries keep their last known values on dates
+without a row.
 """
-def parse_csv(csv_file):
+def parse_series(csv_file):
 
-    countries = []
+    dates = []
+    rows = {}
+    last = {}  # every country, in order of appearance
 
     with open(csv_file, 'r') as f:
         reader = csv.reader(f, delimiter=',')
         next(reader, None)  # skip header
         for row in reader:
-            countries.append(Country(
-                name=row[0],
-                cases=float(row[1])/SCALE, 
-                deaths=float(row[2])/SCALE,
-                recovered=float(row[3])/SCALE))
+            date, name = row[0], row[1]
+            if date not in rows:
+                dates.append(date)
+                rows[date] = {}
+            last.setdefault(name, (0.0, 0.0, 0.0))
+            rows[date][name] = (float(row[2])/SCALE,
+                                float(row[3])/SCALE,
+                                float(row[4])/SCALE)
+
+    frames = []
+
+    for date in dates:
+        last.update(rows[date])
+        frames.append([Country(name, *stats) for name, stats in last.items()])
 
-    return countries
+    return dates, frames
 
 """
-Generates cases, deaths and recovered plots for each country
+Bar heights of a frame, by bar name
 """
-def plot_countries(countries):
+def frame_heights(countries):
 
-    xi = 0
+    heights = {}
+
+    for country in countries:
+        heights[country.name + '_cases'] = country.cases
+        heights[country.name + '_deaths'] = country.deaths
+        heights[country.name + '_recovered'] = country.recovered
+
+    return heights
+
+"""
+Generates cases, deaths and recovered plots for each country, adding the
+bars to 'bars'. 'first' is the position of the first country in the
+whole plot. With 'lod' every tag is a group of detail levels.
+"""
+def plot_countries(countries, bars, first=0, lod=False):
+
+    xi = first * COUNTRY_SEPARATION
 
     bar_groups = {}
 
@@ -65,18 +145,23 @@ def plot_countries(countries):
 
         # first dimension
         name = country.name + '_cases'
-        bar_cases = plot(name, xi, country.cases, 0)
+        bar_cases = plot(bars, name, xi, country.cases, 0, COLOR_CASES)
 
         # second dimension
         name = country.name + '_deaths'
-        bar_deaths = plot(name, xi, country.deaths, BAR_SEPARATION)
+        bar_deaths = plot(bars, name, xi, country.deaths, BAR_SEPARATION,
+                          COLOR_DEATHS)
         
         # third dimension
         name = country.name + '_recovered'
-        bar_recovered = plot(name, xi, country.recovered, BAR_SEPARATION * 2)
+        bar_recovered = plot(bars, name, xi, country.recovered, BAR_SEPARATION * 2,
+                             COLOR_RECOVERED)
 
         # add country names to barplot
-        tag = add_tag(country.name, xi, 0, BAR_SEPARATION * 3)
+        if lod:
+            tag = add_tag_lods(country, xi, 0, BAR_SEPARATION * 3)
+        else:
+            tag = add_tag(country.name, xi, 0, BAR_SEPARATION * 3)
 
         bar_groups[country.name] = [bar_cases, bar_deaths, bar_recovered, tag]
 
@@ -85,170 +170,420 @@ def plot_countries(countries):
     return bar_groups
 
 """
-Generates a single named barplot
+Adds a single named bar of height y whose lower face starts at (x, 0, z).
+Returns its index in 'bars'.
 """
-def plot(name, x, y, z):
-
-    bar_faces = []
-
-    v1 = Vertex(x, 0, z)
-    v2 = Vertex(x + WIDTH, 0, z)
-    v3 = Vertex(x + WIDTH, 0, z + WIDTH)
-    v4 = Vertex(x, 0, z + WIDTH)
-
-    v5 = Vertex(x, y, z)
-    v6 = Vertex(x + WIDTH, y, z)
-    v7 = Vertex(x + WIDTH, y, z + WIDTH)
-    v8 = Vertex(x, y, z + WIDTH)
-
-    # lower face   
-    bar_faces.append(Face(v1,v2,v3,v4))
-
-    # top face
-    bar_faces.append(Face(v5,v6,v7,v8))
-    
-    # side faces
-    bar_faces.append(Face(v1,v5,v8,v4))
-    bar_faces.append(Face(v3,v7,v8,v4))
-    bar_faces.append(Face(v2,v6,v7,v3))
-    bar_faces.append(Face(v2,v1,v5,v6))
+def plot(bars, name, x, y, z, material=None):
 
-    return Bar(name, bar_faces)
+    # the unit bar is scaled to WIDTH x y x WIDTH when written
+    return bars.add(name, x, z, y, material)
 
 """
 Adds a named tag in a given position
 """
 def add_tag(name, x, y, z):
 
-    tag = Tag(name,[],[])
+    tag = Tag(name)
 
     i = 1
     letters = name[::-1]
 
     for letter in letters:
-        
-        if letter == ' ':
-            letter = '_'
-
-        # load letter getting its vertices and triangular faces
-        letter_obj = PATH_COUNTRY_LETTERS + letter.upper() + '.obj'
-        letter_vertices, letter_faces = parse_obj(letter_obj)
-
-        # apply vertex offset
-        for vertex in letter_vertices:
-            vertex.x += x
-            vertex.y += y
-            vertex.z += z + i * LETTER_SEPARATION
-        
-        # add letter vertices and faces to tag
-        tag.vertices.extend(letter_vertices)
-        tag.faces.extend(letter_faces)
+
+        # place a cached copy of the letter after the previous one
+        place_glyph(tag, COUNTRY_GLYPHS.get(letter),
+                    x, y, z + i * LETTER_SEPARATION)
 
         i += 1
 
     return tag
 
+"""
+Country tag at three levels of detail: full name, Country.id
+abbreviation and a billboard quad covering the name
+"""
+def add_tag_lods(country, x, y, z):
+
+    full = add_tag(country.name, x, y, z)
+    levels = [full, add_tag(country.id, x, y, z), billboard(full)]
+
+    for k, level in enumerate(levels):
+        level.name = country.name + '_LOD' + str(k)
+
+    return LodGroup(country.name, levels)
+
+"""
+Two-sided quad over the bounding box of a tag, across its thinnest axis
+"""
+def billboard(tag):
+
+    p = tag.positions
+    low = [min(p[axis::3]) for axis in range(3)]
+    high = [max(p[axis::3]) for axis in range(3)]
+
+    depth = min(range(3), key=lambda axis: high[axis] - low[axis])
+    u, w = [axis for axis in range(3) if axis != depth]
+
+    vertices = []
+    for a, b in ((low[u], low[w]), (high[u], low[w]), (high[u], high[w]), (low[u], high[w])):
+        corner = [0, 0, 0]
+        corner[depth] = (low[depth] + high[depth]) / 2
+        corner[u], corner[w] = a, b
+        vertices.append(Vertex(*corner))
+
+    faces = [Letter_face(0, 1, 2), Letter_face(0, 2, 3),  # front
+             Letter_face(0, 2, 1), Letter_face(0, 3, 2)]  # back
+
+    return Tag(tag.name, vertices, faces)
+
+"""
+Number of vertices the bars and tag of a country add to the scene
+"""
+def country_vertex_count(country):
+
+    # 8 corners per bar plus every letter of the tag
+    return 3 * 8 + sum(COUNTRY_GLYPHS.get(letter).vertex_count
+                       for letter in country.name)
+
 """
 Adds a named tag in a given position
 """
 def add_legend(name, x, y, z):
 
-    tag = Tag(name,[],[])
+    tag = Tag(name)
 
     i = 1
     letters = name[::-1]
 
     for letter in letters:
 
-        if letter == ' ':
-            letter = '_'
-        
-        # load letter getting its vertices and triangular faces
-        letter_obj = PATH_LEGEND_LETTERS + letter.upper() + '.obj'
-        letter_vertices, letter_faces = parse_obj(letter_obj)
-
-        # apply vertex offset
-        for vertex in letter_vertices:
-            vertex.x -= x + i * LETTER_SEPARATION
-            vertex.y += y
-            vertex.z += z
-        
-        # add letter vertices and faces to tag
-        tag.vertices.extend(letter_vertices)
-        tag.faces.extend(letter_faces)
+        # place a cached copy of the letter after the previous one
+        place_glyph(tag, LEGEND_GLYPHS.get(letter),
+                    -(x + i * LETTER_SEPARATION), y, z)
 
         i += 1
 
     return tag 
 
 """
-Parses an .obj file returning letter vertices and faces
+Appends an offset instance of a glyph to a tag
 """
-def parse_obj(obj_file):
+def place_glyph(tag, glyph, dx, dy, dz):
 
-    vertices = []
-    faces = []
+    # glyph indices continue after the letters already in the tag
+    starting_id = tag.vertex_count
 
-    # start from latest vertext id
-    starting_id = Vertex.id - 1
+    p = glyph.positions
+    for k in range(0, len(p), 3):
+        tag.positions.extend((p[k] + dx, p[k + 1] + dy, p[k + 2] + dz))
 
-    with open(obj_file, 'r') as f:
-        for line in f:
-            words = line.split()
-            if words[0] == 'v':
-                vertices.append(
-                    Vertex(float(words[1]), float(words[2]), float(words[3])))
-            elif words[0] == 'f':
-                v1 = int(words[1]) + starting_id
-                v2 = int(words[2]) + starting_id
-                v3 = int(words[3]) + starting_id
-                faces.append(Letter_face(v1, v2, v3))
+    tag.indices.extend(i + starting_id for i in glyph.faces)
 
-    return vertices, faces
+"""
+Generates the legend tags for the three dimensions
+"""
+def add_legends():
+
+    return [add_legend(FIRST_LEGEND, LEGEND_SEPARATION, 0, 0),
+            add_legend(SECOND_LEGEND, LEGEND_SEPARATION, 0, BAR_SEPARATION),
+            add_legend(THIRD_LEGEND, LEGEND_SEPARATION, 0, BAR_SEPARATION * 2)]
 
 """
-Saves the set of barplots into an .obj file
+Gathers bars, country tags and legend into a scene
 """
-def save_obj(obj_file, countries, bar_groups):
+def build_scene(countries, bar_groups, bars):
+
+    scene = Scene(PATH_MATERIALS, bars)
+
+    for country in countries:
+        # country data
+        for obj in bar_groups[country.name]:
+            scene.add(obj)
 
-    tag_cases = add_legend(FIRST_LEGEND, LEGEND_SEPARATION, 0, 0)
-    tag_deaths = add_legend(SECOND_LEGEND, LEGEND_SEPARATION, 0, BAR_SEPARATION)
-    tag_recovered = add_legend(THIRD_LEGEND, LEGEND_SEPARATION, 0, BAR_SEPARATION * 2)
+    # legend
+    for tag in add_legends():
+        scene.add(tag)
+
+    return scene
+
+"""
+Saves the scene into an .obj file. With 'batch' the objects sharing a
+material are merged into one, and a side-car .json index keeps the
+vertex and face ranges of every bar and tag so they can still be picked.
+"""
+def save_obj(obj_file, scene, precision=None, batch=False):
 
     with open(obj_file, 'w') as f:
-        # import materials
-        f.write('mtllib ' + PATH_MATERIALS)
-        for country in countries:
-            # country data
-            f.write(str(bar_groups[country.name][0]))
-            f.write(str(bar_groups[country.name][1]))
-            f.write(str(bar_groups[country.name][2]))
-            f.write(str(bar_groups[country.name][3]))
-        # legend
-        f.write(str(tag_cases))
-        f.write(str(tag_deaths))
-        f.write(str(tag_recovered))
-
-def run(input_file, output_file):
+        writer = ObjWriter(f, precision)
+        if batch:
+            index = scene.write_batched(writer)
+        else:
+            scene.write(writer)
+        writer.flush()
+
+    if batch:
+        with open(os.path.splitext(obj_file)[0] + '.json', 'w') as f:
+            json.dump({'obj': os.path.basename(obj_file), 'objects': index}, f,
+                      separators=(',', ':'))
+
+"""
+Saves the scene into a glTF binary. Bars of each material are instances
+of one unit bar mesh (EXT_mesh_gpu_instancing) placed and scaled by
+their records, and LOD groups use MSFT_lod.
+"""
+def save_glb(glb_file, scene, materials=None):
+
+    builder = GlbBuilder(materials)
+    bars = scene.bars
+
+    unit = Mesh(face_size=4)
+    for corner in BAR_CORNERS:
+        unit.add_vertex(*corner)
+    unit.faces.extend(BAR_FACES)
+
+    instances = {}
+    for obj in scene.objects:
+        if isinstance(obj, int):
+            instances.setdefault(bars.material[obj], []).append(obj)
+        elif isinstance(obj, LodGroup):
+            nodes = []
+            for level in obj.levels:
+                mesh = builder.add_mesh(level.name, level.material(), level.to_mesh())
+                if mesh is not None:
+                    nodes.append({'name': level.name, 'mesh': mesh})
+            builder.add_lods(nodes)
+        else:
+            mesh = builder.add_mesh(obj.name, obj.material(), obj.to_mesh())
+            if mesh is not None:
+                builder.add_node({'name': obj.name, 'mesh': mesh})
+
+    for m, indices in instances.items():
+        material = bars.materials[m]
+        translations = array('d')
+        scales = array('d')
+        for i in indices:
+            translations.extend((bars.x[i], 0.0, bars.z[i]))
+            scales.extend((bars.width, bars.height[i], bars.width))
+
+        name = (material or 'bars') + '_bars'
+        mesh = builder.add_mesh(name, material, unit)
+        builder.add_instances({'name': name, 'mesh': mesh}, translations, scales)
+
+    builder.save(glb_file)
+
+"""
+Saves the scene in the format given by the output extension. Returns
+the paths written.
+"""
+def save_scene(output_file, scene, format=None, precision=None, batch=False):
+
+    format = format_of(output_file, format)
+
+    # formats without LOD groups, and batches, get one file per level:
+    # in a single OBJ every viewer would draw all levels on top of each
+    # other
+    if scene.lod_levels() and (batch or format in ('obj', 'ply', 'stl')):
+        name, ext = os.path.splitext(output_file)
+        paths = []
+        for k in range(scene.lod_levels()):
+            paths += save_scene(name + '_LOD' + str(k) + ext, scene.level(k), format,
+                                precision, batch)
+        return paths
+
+    if format == 'obj':
+        save_obj(output_file, scene, precision, batch)
+        return [output_file]
+
+    # material library path is relative to the output folder
+    materials = load_mtl(os.path.join(os.path.dirname(output_file), PATH_MATERIALS))
+
+    if format == 'glb':
+        save_glb(output_file, scene, materials)
+        return [output_file]
+
+    save_mesh(output_file, scene.parts(), format, materials, precision)
+    return [output_file]
+
+"""
+Generates the objects of a chunk of countries. OBJ output is serialized
+here, numbering vertices from the chunk offset in the final file; other
+formats, and LOD plots written one file per level, get the chunk scene
+back.
+"""
+def render_chunk(job):
+
+    first, countries, offset, format, precision, lod = job
+
+    bars = Bars(WIDTH)
+    bar_groups = plot_countries(countries, bars, first, lod)
+
+    scene = Scene(None, bars)
+    for country in countries:
+        for obj in bar_groups[country.name]:
+            scene.add(obj)
+
+    if format != 'obj' or lod:
+        return scene
+
+    text = io.StringIO()
+    writer = ObjWriter(text, precision, vertex_count=offset)
+    scene.write(writer)
+    writer.flush()
+
+    return text.getvalue()
+
+"""
+Splits the countries into chunks generated by a pool of worker processes
+and joins the fragments, in order, into the output file. Returns the
+paths written.
+"""
+def save_parallel(output_file, countries, workers, format=None, precision=None,
+                  lod=False):
+
+    format = format_of(output_file, format)
+
+    # a few chunks per worker keep the pool busy when chunks differ in size
+    size = max(1, -(-len(countries) // (workers * 4)))
+
+    # OBJ fragments are streamed into the file, except LOD levels which
+    # go to a file each through the scene
+    stream = format == 'obj' and not lod
+
+    # prefix sums of the vertex counts give the offset of every chunk
+    jobs = []
+    offset = 0
+    for first in range(0, len(countries), size):
+        chunk = countries[first:first + size]
+        jobs.append((first, chunk, offset, format, precision, lod))
+        if stream:
+            offset += sum(country_vertex_count(country) for country in chunk)
+
+    legends = Scene()
+    for tag in add_legends():
+        legends.add(tag)
+
+    with Pool(workers) as pool:
+        fragments = pool.imap(render_chunk, jobs)
+
+        if stream:
+            with open(output_file, 'w') as f:
+                f.write('mtllib ' + PATH_MATERIALS)
+                for fragment in fragments:
+                    f.write(fragment)
+                writer = ObjWriter(f, precision, vertex_count=offset)
+                legends.write(writer)
+                writer.flush()
+            return [output_file]
+
+        scene = Scene(PATH_MATERIALS, Bars(WIDTH))
+        for fragment in fragments:
+            scene.extend(fragment)
+
+    scene.extend(legends)
+    return save_scene(output_file, scene, format, precision)
+
+def run(input_file, output_file, format=None, workers=1, metrics=None,
+        aggregate='last', batch=False, lod=False):
     
+    # batches index the objects of one .obj file, written by this process
+    if batch and format_of(output_file, format) != 'obj':
+        raise ValueError('--batch needs .obj output')
+    if batch and workers > 1:
+        raise ValueError('--batch cannot be combined with --workers')
+
     # get data from .csv file
-    countries = parse_csv(input_file)
+    countries = parse_csv(input_file, metrics, aggregate)
+
+    if workers > 1:
+        return save_parallel(PATH_OUTPUT + output_file, countries, workers, format, lod=lod)
     
     # create barplots from data
-    bar_groups = plot_countries(countries)
+    bars = Bars(WIDTH)
+    bar_groups = plot_countries(countries, bars, lod=lod)
+
+    # generate final 3D file
+    scene = build_scene(countries, bar_groups, bars)
+    return save_scene(PATH_OUTPUT + output_file, scene, format, batch=batch)
 
-    # generate final .obj file
-    save_obj(PATH_OUTPUT + output_file, countries, bar_groups)
+def run_series(input_file, output_file, format=None):
+
+    # get daily data from .csv file
+    dates, frames = parse_series(input_file)
+
+    # the first date sets up the scene, later dates only move bar tops
+    bars = Bars(WIDTH)
+    bar_groups = plot_countries(frames[0], bars)
+    scene = build_scene(frames[0], bar_groups, bars)
+    heights = [frame_heights(countries) for countries in frames]
+
+    output_file = PATH_OUTPUT + output_file
+    format = format_of(output_file, format)
+    materials = None
+    if format != 'obj':
+        materials = load_mtl(os.path.join(os.path.dirname(output_file), PATH_MATERIALS))
+
+    if format == 'glb':
+        save_animation(output_file, scene, heights, materials, FRAME_RATE)
+        return dates, [output_file]
+
+    return dates, save_frames(output_file, scene, heights, format, materials)
 
 if __name__ == '__main__':
-    if len(argv) != 3:
-        print('Usage: ./3Dbarplot <input.csv> <output.obj>')
-        exit()
-    elif argv[1].endswith('.csv') and argv[2].endswith('.obj'):
+    parser = argparse.ArgumentParser(
+        usage='./3Dbarplot <input.csv> <output.obj|ply|stl|glb> [--format F] [--workers N]\n'
+              '       [--metrics CASES,DEATHS,RECOVERED] [--aggregate sum|last|max] [--batch] [--lod]\n'
+              '       (a date,country,cases,deaths,recovered .csv gives one scene per date)')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--format', choices=sorted(WRITERS),
+                        help='output format (default: from the output extension)')
+    parser.add_argument('--workers', type=int,
+                        help='processes generating the countries (default: 1)')
+    parser.add_argument('--metrics',
+                        help='comma separated cases, deaths and recovered column names')
+    parser.add_argument('--aggregate', choices=AGGREGATES,
+                        help='how rows of the same country are combined (default: last)')
+    parser.add_argument('--batch', action='store_true',
+                        help='.obj output: one object per material plus a .json index')
+    parser.add_argument('--lod', action='store_true',
+                        help='country tags at three levels of detail (<name>_LOD0..2)')
+    args = parser.parse_args()
+
+    try:
+        format = format_of(args.output, args.format)
+    except ValueError:
+        format = None
+
+    if args.input.endswith('.csv') and format:
         print('\n================ CREATING 3D BARPLOTS ================\n')
-        run(argv[1], argv[2])
-        print('Done and saved in ' + PATH_OUTPUT + argv[2])
+        if is_series(args.input):
+            # snapshot options have no meaning for a series
+            ignored = [option for option, given in
+                       (('--workers', args.workers is not None),
+                        ('--metrics', args.metrics is not None),
+                        ('--aggregate', args.aggregate is not None),
+                        ('--batch', args.batch), ('--lod', args.lod)) if given]
+            if ignored:
+                print('Error: ' + ', '.join(ignored) + ' not supported with date series input')
+                exit()
+            dates, paths = run_series(args.input, args.output, format)
+            if format == 'glb':
+                print('Animated ' + str(len(dates)) + ' dates')
+                print('Done and saved in ' + paths[0])
+            else:
+                print('Saved one ' + format + ' file per date (' + str(len(dates)) + ')')
+                print('Done and saved in ' + paths[0] + ' ... ' + paths[-1])
+        else:
+            metrics = args.metrics.split(',') if args.metrics else None
+            try:
+                paths = run(args.input, args.output, format, max(1, args.workers or 1),
+                            metrics, args.aggregate or 'last', args.batch, args.lod)
+            except ValueError as e:
+                print('Error: ' + str(e))
+                exit()
+            print('Done and saved in ' + ', '.join(paths))
         print('\n======================================================\n')
     else:
-        print('Error: input must be a .csv file and output file be an .obj file')
+        print('Error: input must be a .csv file and output one of: ' +
+              ', '.join('.' + f for f in WRITERS))
         exit()
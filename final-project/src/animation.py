@@ -0,0 +1,167 @@
+"""
+Computer Graphics. Course 2019/2020. ESI UCLM.
+Final Project. Antonio Manjavacas.
+Time-series output: one scene per date, generated incrementally
+"""
+
+import io
+import os
+
+from array import array
+from copy import copy
+
+from utils import BAR_CORNERS
+from meshlib import ObjWriter, save_mesh
+from meshlib.formats import GlbBuilder, merge
+
+
+"""
+Output file of a frame: <name>_<number>.<ext>
+"""
+def frame_file(output_file, number, frame_count):
+    name, ext = os.path.splitext(output_file)
+    digits = max(4, len(str(frame_count - 1)))
+    return name + '_' + str(number).zfill(digits) + ext
+
+
+"""
+Copy of a bar table whose heights can be changed frame by frame while
+the scene keeps its own
+"""
+def frame_bars(bars):
+
+    result = copy(bars)
+    result.height = array('d', bars.height)
+    return result
+
+
+"""
+Renders every object of the scene on its own, numbering its vertices
+from its position in the whole file
+"""
+def render_objects(scene, precision=None):
+
+    texts = []
+    offsets = []
+    count = 0
+
+    for obj in scene.objects:
+        text = io.StringIO()
+        writer = ObjWriter(text, precision, vertex_count=count)
+        scene.write_object(writer, obj)
+        writer.flush()
+
+        texts.append(text.getvalue())
+        offsets.append(count)
+        count = writer.vertex_count
+
+    return texts, offsets
+
+
+"""
+Writes one file per frame. 'frames' holds the bar heights of every
+frame by bar name. Objects are rendered once and only the bars whose
+height changed since the previous frame are rendered again. Returns the
+paths written.
+"""
+def save_frames(output_file, scene, frames, format, materials=None, precision=None):
+
+    bars = frame_bars(scene.bars)
+    paths = []
+    instances = [(i, obj) for i, obj in enumerate(scene.objects) if isinstance(obj, int)]
+
+    if format == 'obj':
+        texts, offsets = render_objects(scene, precision)
+    else:
+        parts = scene.parts()
+
+    for number, heights in enumerate(frames):
+
+        for i, bar in instances:
+            height = heights.get(bars.names[bar], bars.height[bar])
+            if height == bars.height[bar]:
+                continue
+            bars.height[bar] = height
+
+            if format == 'obj':
+                text = io.StringIO()
+                writer = ObjWriter(text, precision, vertex_count=offsets[i])
+                bars.write(writer, bar)
+                writer.flush()
+                texts[i] = text.getvalue()
+            else:
+                parts[i] = (bars.names[bar], bars.material_of(bar), bars.to_mesh(bar))
+
+        path = frame_file(output_file, number, len(frames))
+        if format == 'obj':
+            with open(path, 'w') as f:
+                f.write('mtllib ' + scene.material_library)
+                f.write(''.join(texts))
+        else:
+            save_mesh(path, parts, format, materials, precision)
+        paths.append(path)
+
+    return paths
+
+
+"""
+Writes a single glTF binary where the bars of each material form one
+mesh with a morph target per frame after the first. A target only
+stores the top vertices of the bars that differ from the first frame.
+"""
+def save_animation(output_file, scene, frames, materials=None, frame_rate=10):
+
+    builder = GlbBuilder(materials)
+    bars = frame_bars(scene.bars)
+
+    groups = {}
+    for obj in scene.objects:
+        if isinstance(obj, int):
+            bars.height[obj] = frames[0].get(bars.names[obj], bars.height[obj])
+            groups.setdefault(bars.material_of(obj), []).append(obj)
+        else:
+            # tags and legend do not change between frames
+            index = builder.add_mesh(obj.name, obj.material(), obj.to_mesh())
+            if index is not None:
+                builder.add_node({'name': obj.name, 'mesh': index})
+
+    # corners of the top face of the unit bar
+    top = [k for k, corner in enumerate(BAR_CORNERS) if corner[1]]
+
+    target_count = len(frames) - 1
+    channels = {}
+
+    for material, group in groups.items():
+
+        parts = [(bars.names[bar], material, bars.to_mesh(bar)) for bar in group]
+
+        targets = []
+        for heights in frames[1:]:
+            indices = array('I')
+            offsets = array('d')
+            for n, bar in enumerate(group):
+                dy = heights.get(bars.names[bar], bars.height[bar]) - bars.height[bar]
+                if dy:
+                    indices.extend(n * len(BAR_CORNERS) + k for k in top)
+                    offsets.extend((0.0, dy, 0.0) * len(top))
+            targets.append((indices, offsets))
+
+        name = (material or 'bars') + '_bars'
+        mesh = builder.add_mesh(name, material, merge(parts))
+        if mesh is None:
+            continue
+        if target_count:
+            builder.add_targets(mesh, targets)
+        node = builder.add_node({'name': name, 'mesh': mesh})
+
+        # frame k shows target k - 1 alone, the first frame none
+        weights = array('d', bytes(8 * len(frames) * target_count))
+        for k in range(1, len(frames)):
+            weights[k * target_count + k - 1] = 1.0
+        channels[node] = weights
+
+    if target_count:
+        times = [k / frame_rate for k in range(len(frames))]
+        builder.add_animation('frames', times, channels)
+
+    builder.save(output_file)
@@ -0,0 +1,60 @@
+"""
+Computer Graphics. Course 2019/2020. ESI UCLM.
+Final Project. Antonio Manjavacas.
+Glyph atlas: letter meshes loaded once per process
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from meshlib import load_obj
+
+
+"""
+Letter mesh stored as immutable flat tuples: x y z positions and
+zero-based triangle indices
+"""
+class Glyph:
+
+    __slots__ = ('positions', 'faces')
+
+    def __init__(self, positions, faces):
+        self.positions = positions
+        self.faces = faces
+
+    @property
+    def vertex_count(self):
+        return len(self.positions) // 3
+
+
+"""
+Lazily loaded set of glyphs read from <path>/<LETTER>.obj
+"""
+class GlyphAtlas:
+
+    def __init__(self, path):
+        self.path = path
+        self.glyphs = {}
+
+    def get(self, letter):
+
+        if letter == ' ':
+            letter = '_'
+        letter = letter.upper()
+
+        glyph = self.glyphs.get(letter)
+        if glyph is None:
+            mesh = load_obj(os.path.join(self.path, letter + '.obj'))
+            glyph = Glyph(tuple(mesh.positions), tuple(mesh.faces))
+            self.glyphs[letter] = glyph
+
+        return glyph
+
+    def preload(self):
+        # reads every glyph of the folder up front
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith('.obj'):
+                self.get(name[:-4])
+        return self
@@ -0,0 +1,153 @@
+"""
+Computer Graphics. Course 2019/2020. ESI UCLM.
+Final Project. Antonio Manjavacas.
+Streaming .csv ingestion: rows are read in chunks, converted into typed
+columns and aggregated per key as they arrive
+"""
+
+import csv
+
+from array import array
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+CHUNK_ROWS = 65536 # rows converted at once
+
+AGGREGATES = ('sum', 'last', 'max')
+
+
+"""
+Metric columns aggregated per key. Keys keep their order of first
+appearance and metrics[name][i] is the value for keys[i], so memory
+grows with the number of keys and not with the number of rows.
+"""
+class Table:
+    def __init__(self, key, metrics):
+        self.key = key
+        self.keys = []
+        self.index = {}
+        self.metrics = dict((name, array('d')) for name in metrics)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def slots(self, keys, empty):
+
+        # row of every key, adding the keys not seen before
+        result = []
+        for key in keys:
+            slot = self.index.get(key)
+            if slot is None:
+                slot = self.index[key] = len(self.keys)
+                self.keys.append(key)
+                for column in self.metrics.values():
+                    column.append(empty)
+            result.append(slot)
+
+        return result
+
+    def rows(self):
+        columns = list(self.metrics.values())
+        for i, key in enumerate(self.keys):
+            yield key, tuple(column[i] for column in columns)
+
+
+"""
+Folds a chunk of values into the aggregated column
+"""
+def aggregate_into(column, slots, values, aggregate):
+
+    if np is not None:
+        target = np.frombuffer(column, dtype=np.float64)
+        slots = np.array(slots, dtype=np.intp)
+        values = np.frombuffer(values, dtype=np.float64)
+        if aggregate == 'sum':
+            np.add.at(target, slots, values)
+        elif aggregate == 'max':
+            np.maximum.at(target, slots, values)
+        else:
+            # last occurrence of every slot in the chunk
+            unique, first = np.unique(slots[::-1], return_index=True)
+            target[unique] = values[::-1][first]
+        return
+
+    if aggregate == 'sum':
+        for slot, value in zip(slots, values):
+            column[slot] += value
+    elif aggregate == 'max':
+        for slot, value in zip(slots, values):
+            if value > column[slot]:
+                column[slot] = value
+    else:
+        for slot, value in zip(slots, values):
+            column[slot] = value
+
+
+"""
+Returns the column names of a .csv file
+"""
+def read_header(csv_file):
+
+    with open(csv_file, 'r', newline='') as f:
+        return [name.strip() for name in next(csv.reader(f, delimiter=','), [])]
+
+
+"""
+Checks whether a .csv field holds a number
+"""
+def is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+"""
+Reads a .csv file into a Table. 'key' and 'metrics' are header names;
+by default the key is the first column and the metrics are the other
+columns holding numbers in the first chunk of rows, so text columns are
+left alone. Rows repeating a key are combined with 'aggregate'.
+"""
+def read_table(csv_file, metrics=None, key=None, aggregate='last',
+               chunk_rows=CHUNK_ROWS):
+
+    if aggregate not in AGGREGATES:
+        raise ValueError('aggregate must be one of: ' + ', '.join(AGGREGATES))
+
+    with open(csv_file, 'r', newline='') as f:
+        reader = csv.reader(f, delimiter=',')
+        header = [name.strip() for name in next(reader, [])]
+
+        key = key or header[0]
+        rows = list(islice(reader, chunk_rows))
+        if metrics is None:
+            metrics = [name for i, name in enumerate(header) if name != key
+                       and all(i < len(row) and is_number(row[i]) for row in rows)]
+
+        positions = {}
+        for name in [key] + list(metrics):
+            if name not in header:
+                raise ValueError('no column named ' + repr(name) + ' in ' + csv_file)
+            positions[name] = header.index(name)
+
+        table = Table(key, metrics)
+        empty = float('-inf') if aggregate == 'max' else 0.0
+        k = positions[key]
+
+        while rows:
+            slots = table.slots([row[k] for row in rows], empty)
+
+            for name in metrics:
+                p = positions[name]
+                values = array('d', map(float, (row[p] for row in rows)))
+                aggregate_into(table.metrics[name], slots, values, aggregate)
+
+            rows = list(islice(reader, chunk_rows))
+
+    return table
@@ -2,9 +2,19 @@
 """
 Computer Graphics. Course 2019/2020. ESI UCLM.
 Final Project. Antonio Manjavacas.
-3D Utils: Vertex, Vector and Face classes
+3D Utils: vertices, faces, tags, instanced bars and scenes
 """
 
+import io
+import os
+import sys
+
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from meshlib import Mesh, ObjWriter
+
 """
 3D Vertex representation
 """
@@ -17,16 +27,13 @@ COLOR_TAG = 'Yellow'
 
 class Vertex:
 
-    id = 1
+    __slots__ = ('x', 'y', 'z')
 
     def __init__(self, x, y, z):
         self.x = x
         self.y = y
         self.z = z
 
-        self.id = Vertex.id
-        Vertex.id += 1
-
     def __str__(self):
         return 'v ' + str(self.x) + ' ' + str(self.y) + ' ' + str(self.z)
 
@@ -37,101 +44,313 @@ class Vertex:
             return False
 
 """
-Quad face representation
+Triangular face used for letters storage, given by vertex indices
+local to its tag
 """
-class Face:
-    def __init__(self, v1, v2, v3, v4):
+class Letter_face:
+
+    __slots__ = ('v1', 'v2', 'v3')
+
+    def __init__(self, v1, v2, v3):
         self.v1 = v1
         self.v2 = v2
         self.v3 = v3
-        self.v4 = v4
 
-        self.vertices = [v1,v2,v3,v4]
+    @property
+    def vertices(self):
+        return (self.v1, self.v2, self.v3)
 
     def __str__(self):
-        return 'f ' + str(self.v1.id) + ' ' + str(self.v2.id) + ' ' + str(self.v3.id) + ' ' + str(self.v4.id)
+        return 'f ' + str(self.v1) + ' ' + str(self.v2) + ' ' + str(self.v3)
 
 
 """
-Triangular face used for letters storage
+Vertices and faces representing a set of letters. Positions are stored
+in one float array and the face indices, local to the tag, in one int
+array; they become file ids when the tag is written.
 """
-class Letter_face:
-    def __init__(self, v1, v2, v3):
-        self.v1 = v1
-        self.v2 = v2
-        self.v3 = v3
+class Tag:
+    def __init__(self, name, vertices=(), faces=()):
+        self.name = name
+        self.positions = array('d')
+        self.indices = array('I')
+
+        for v in vertices:
+            self.positions.extend((v.x, v.y, v.z))
+        for f in faces:
+            self.indices.extend(f.vertices)
+
+    @property
+    def vertex_count(self):
+        return len(self.positions) // 3
+
+    # Vertex and Letter_face views, built on demand
+
+    @property
+    def vertices(self):
+        p = self.positions
+        return [Vertex(x, y, z) for x, y, z in zip(p[0::3], p[1::3], p[2::3])]
+
+    @property
+    def faces(self):
+        f = self.indices
+        return [Letter_face(a, b, c) for a, b, c in zip(f[0::3], f[1::3], f[2::3])]
+
+    def material(self):
+        return COLOR_TAG
 
-        self.vertices = [v1,v2,v3]
+    def to_mesh(self):
+        return Mesh(array('d', self.positions), array('I', self.indices))
+
+    def write(self, writer):
+
+        writer.write('\no ' + self.name + '\n')
+
+        first = writer.vertex_count + 1
+        writer.write_vertices(self.positions)
+
+        writer.write('usemtl ' + COLOR_TAG + '\n')
+
+        writer.write_faces(self.indices, base=first)
+
+    def write_geometry(self, writer):
+
+        # vertices and faces only, returning the number of faces
+        first = writer.vertex_count + 1
+        writer.write_vertices(self.positions)
+        writer.write_faces(self.indices, base=first)
+
+        return len(self.indices) // 3
 
     def __str__(self):
-        return 'f ' + str(self.v1) + ' ' + str(self.v2) + ' ' + str(self.v3)
+        return render(self)
 
 
 """
-Vertices and faces representing a set of letters
+Versions of an object from the most to the least detailed. Each level
+keeps its own name, <name>_LOD<k>, so viewers can group them.
 """
-class Tag:
-    def __init__(self, name, vertices, faces):
+class LodGroup:
+    def __init__(self, name, levels):
         self.name = name
-        self.vertices = vertices
-        self.faces = faces
+        self.levels = levels
 
-    def __str__(self):
-        
-        header = '\no ' + self.name + '\n'
+    def material(self):
+        return self.levels[0].material()
 
-        text_vertices = ''
-        for v in self.vertices:
-            text_vertices += 'v ' + str(v.x) + ' ' + str(v.y) + ' ' + str(v.z) + '\n'
+    def level(self, k):
+        return self.levels[min(k, len(self.levels) - 1)]
 
-        material = 'usemtl ' + COLOR_TAG + '\n'
+    def to_mesh(self):
+        return self.levels[0].to_mesh()
 
-        text_faces = ''
-        for f in self.faces:
-            text_faces += 'f ' + str(f.v1) + ' ' + str(f.v2) + ' ' + str(f.v3) + '\n'
+    def write(self, writer):
+        for level in self.levels:
+            level.write(writer)
 
-        return header + text_vertices + material + text_faces
+
+"""
+Unit bar: corners of the lower face, then of the top face, and the
+quads joining them (lower, top and four sides)
+"""
+BAR_CORNERS = ((0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1),
+               (0, 1, 0), (1, 1, 0), (1, 1, 1), (0, 1, 1))
+
+BAR_FACES = (0, 1, 2, 3,
+             4, 5, 6, 7,
+             0, 4, 7, 3,
+             2, 6, 7, 3,
+             1, 5, 6, 2,
+             1, 0, 4, 5)
 
 
 """
-Simple bar plot
+Bars sharing the unit bar mesh. Every bar is a record in parallel
+arrays (name, x, z, height and material) and its geometry is only
+expanded when it is written.
 """
-class Bar:
-    def __init__(self, name, faces):
-        self.name = name
-        self.faces = faces
+class Bars:
+    def __init__(self, width):
+        self.width = width
+        self.names = []
+        self.x = array('d')
+        self.z = array('d')
+        self.height = array('d')
+        self.material = array('B')  # index in self.materials
+        self.materials = []
 
-    def __str__(self):
-        
-        header = '\no ' + self.name + '\n'
-        
-        vertices = []
-        text_vertices = ''
-        for face in self.faces:
-            if(face.v1 not in vertices):
-                text_vertices += str(face.v1) + '\n'
-                vertices.append(face.v1)
-            if(face.v2 not in vertices):
-                text_vertices += str(face.v2) + '\n'
-                vertices.append(face.v2)
-            if(face.v3 not in vertices):
-                text_vertices += str(face.v3) + '\n'
-                vertices.append(face.v3)
-            if(face.v4 not in vertices):
-                text_vertices += str(face.v4) + '\n'
-                vertices.append(face.v4)
-        
-        material = ''
-        if self.name.endswith('_cases'):
-            material += 'usemtl ' + COLOR_CASES + '\n'
-        elif self.name.endswith('_deaths'):
-            material += 'usemtl ' + COLOR_DEATHS + '\n'
-        elif self.name.endswith('_recovered'):
-            material += 'usemtl ' + COLOR_RECOVERED + '\n'
-
-        text_faces = ''
-        for face in self.faces:
-            text_faces += str(face) + '\n'
-        
-        return header + text_vertices + material + text_faces
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, x, z, height, material=None):
+
+        if material not in self.materials:
+            self.materials.append(material)
+
+        self.names.append(name)
+        self.x.append(x)
+        self.z.append(z)
+        self.height.append(height)
+        self.material.append(self.materials.index(material))
+
+        return len(self.names) - 1
+
+    def extend(self, other):
 
+        # appends the bars of another table, returning the index of the first
+        first = len(self)
+        for i in range(len(other)):
+            self.add(other.names[i], other.x[i], other.z[i], other.height[i],
+                     other.material_of(i))
+        return first
+
+    def material_of(self, i):
+        return self.materials[self.material[i]]
+
+    def corners(self, i):
+
+        # x y z of the 8 corners; whole numbers are kept as ints, as in
+        # the coordinates given to plot()
+        x0, z0 = number(self.x[i]), number(self.z[i])
+        x1, z1 = number(self.x[i] + self.width), number(self.z[i] + self.width)
+        xs, ys, zs = (x0, x1), (0, self.height[i]), (z0, z1)
+
+        return [c for dx, dy, dz in BAR_CORNERS for c in (xs[dx], ys[dy], zs[dz])]
+
+    def to_mesh(self, i):
+
+        mesh = Mesh(face_size=4)
+        mesh.positions.extend(self.corners(i))
+        mesh.faces.extend(BAR_FACES)
+
+        return mesh
+
+    def write(self, writer, i):
+
+        writer.write('\no ' + self.names[i] + '\n')
+
+        first = writer.vertex_count + 1
+        writer.write_vertices(self.corners(i))
+
+        material = self.material_of(i)
+        if material:
+            writer.write('usemtl ' + material + '\n')
+
+        writer.write_faces(BAR_FACES, face_size=4, base=first)
+
+    def write_geometry(self, writer, i):
+
+        # vertices and faces only, returning the number of faces
+        first = writer.vertex_count + 1
+        writer.write_vertices(self.corners(i))
+        writer.write_faces(BAR_FACES, face_size=4, base=first)
+
+        return len(BAR_FACES) // 4
+
+
+"""
+Whole floats as ints, so they are written without a decimal part
+"""
+def number(value):
+    return int(value) if value.is_integer() else value
+
+
+"""
+Ordered set of named objects sharing one vertex numbering, which is
+assigned when the scene is written. Bars are stored in 'bars' and
+listed in 'objects' by their index.
+"""
+class Scene:
+    def __init__(self, material_library=None, bars=None):
+        self.material_library = material_library
+        self.bars = bars if bars is not None else Bars(1)
+        self.objects = []
+
+    def add(self, obj):
+        self.objects.append(obj)
+
+    def extend(self, other):
+        first = self.bars.extend(other.bars)
+        for obj in other.objects:
+            self.add(first + obj if isinstance(obj, int) else obj)
+
+    def write(self, writer):
+        if self.material_library:
+            writer.write('mtllib ' + self.material_library)
+        for obj in self.objects:
+            self.write_object(writer, obj)
+
+    def write_object(self, writer, obj):
+        if isinstance(obj, int):
+            self.bars.write(writer, obj)
+        else:
+            obj.write(writer)
+
+    def name_of(self, obj):
+        return self.bars.names[obj] if isinstance(obj, int) else obj.name
+
+    def material_of(self, obj):
+        return self.bars.material_of(obj) if isinstance(obj, int) else obj.material()
+
+    def write_batched(self, writer):
+
+        # one object per material holding the geometry of every object
+        # using it. Returns where each original object ended up: its
+        # first vertex id and vertex count in the file, and its first face
+        # and face count within the material object.
+        if self.material_library:
+            writer.write('mtllib ' + self.material_library)
+
+        batches = {}
+        for obj in self.objects:
+            batches.setdefault(self.material_of(obj), []).append(obj)
+
+        index = []
+        for material, objects in batches.items():
+            writer.write('\no ' + (material or 'default') + '\n')
+            if material:
+                writer.write('usemtl ' + material + '\n')
+
+            faces = 0
+            for obj in objects:
+                first = writer.vertex_count + 1
+                if isinstance(obj, int):
+                    count = self.bars.write_geometry(writer, obj)
+                else:
+                    count = obj.write_geometry(writer)
+                index.append({'name': self.name_of(obj), 'material': material,
+                              'vertices': [first, writer.vertex_count + 1 - first],
+                              'faces': [faces, count]})
+                faces += count
+
+        return index
+
+    def lod_levels(self):
+        return max([len(obj.levels) for obj in self.objects
+                    if isinstance(obj, LodGroup)] or [0])
+
+    def level(self, k):
+
+        # same scene with every LOD group replaced by its level k
+        scene = Scene(self.material_library, self.bars)
+        for obj in self.objects:
+            scene.add(obj.level(k) if isinstance(obj, LodGroup) else obj)
+        return scene
+
+    def parts(self):
+        parts = []
+        for obj in self.objects:
+            mesh = self.bars.to_mesh(obj) if isinstance(obj, int) else obj.to_mesh()
+            parts.append((self.name_of(obj), self.material_of(obj), mesh))
+        return parts
+
+
+"""
+Renders an object as .obj text
+"""
+def render(obj):
+    text = io.StringIO()
+    writer = ObjWriter(text)
+    obj.write(writer)
+    writer.flush()
+    return text.getvalue()
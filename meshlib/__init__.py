@@ -0,0 +1,11 @@
+"""
+Computer Graphics. Shared mesh utilities.
+Array-backed mesh representation, OBJ input and mesh output formats used
+by the algorithms and the final project.
+"""
+
+from .mesh import Mesh
+from .obj import load_obj, save_obj, ObjWriter
+from .weld import Welder
+from .cache import MeshCache
+from .formats import save_mesh, load_mtl
@@ -0,0 +1,221 @@
+"""
+Content-addressed cache of computed meshes.
+
+Entries are keyed on the SHA-256 of the input file bytes, the operation,
+its parameters and a version number, so changing any of them misses the
+cache instead of returning a stale result. Each entry is one binary file
+holding the mesh arrays as raw little-endian data, read back with a
+single copy. The least recently used entries are deleted when the cache
+grows over its size limit, along with temporary files left behind by
+writers that were killed halfway.
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from array import array
+
+from .formats import _little_endian
+from .mesh import Mesh
+
+# Bump when the entry layout changes
+FORMAT_VERSION = 1
+
+MAGIC = b'MSHC'
+
+# magic, format version, face size, position / face / line counts, value,
+# name / header / smoothing lengths
+HEADER = struct.Struct('<4sIIQQQqIII')
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'meshlib')
+DEFAULT_SIZE = 1 << 30  # bytes
+
+# Temporary files older than this were left by a failed or killed writer
+STALE_TEMPORARY = 3600  # seconds
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _native(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class MeshCache:
+
+    # Meshes stored under 'path', at most 'max_size' bytes in total. Each
+    # entry also keeps one integer returned by the operation (welded or
+    # boundary counts). The modification time of an entry is its last
+    # use, so eviction needs no index file.
+
+    def __init__(self, path=None, max_size=DEFAULT_SIZE):
+        self.path = path or os.environ.get('MESHLIB_CACHE') or DEFAULT_PATH
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def key(self, input_file, operation, version, **params):
+
+        # Parameters are written with repr, which keeps every float digit
+        digest = hashlib.sha256(file_digest(input_file).encode())
+        digest.update(repr((operation, version, FORMAT_VERSION,
+                            sorted(params.items()))).encode())
+        return digest.hexdigest()
+
+    def entry(self, key):
+        return os.path.join(self.path, key + '.mesh')
+
+    def get(self, key):
+
+        # (mesh, value) or None when missing or unreadable
+        path = self.entry(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            result = self.decode(data)
+        except (OSError, ValueError, struct.error):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, mesh, value=0):
+
+        # Written to a temporary file and renamed, so readers never see a
+        # partial entry
+        descriptor, temporary = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(self.encode(mesh, value))
+            os.replace(temporary, self.entry(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict()
+
+    def run(self, key, build, save):
+
+        # Passes the mesh cached under 'key' to save(mesh), or the one
+        # returned by build() as (mesh, value) after storing it. Returns
+        # the value.
+        cached = self.get(key)
+        if cached is None:
+            cached = build()
+            self.put(key, *cached)
+        mesh, value = cached
+        save(mesh)
+        return value
+
+    def encode(self, mesh, value):
+        name = mesh.name.encode()
+        header = mesh.header.encode()
+        smoothing = mesh.smoothing.encode()
+        return b''.join((
+            HEADER.pack(MAGIC, FORMAT_VERSION, mesh.face_size, len(mesh.positions),
+                        len(mesh.faces), len(mesh.lines), value,
+                        len(name), len(header), len(smoothing)),
+            name, header, smoothing,
+            _little_endian(mesh.positions),
+            _little_endian(mesh.faces),
+            _little_endian(mesh.lines)))
+
+    def decode(self, data):
+        (magic, version, face_size, positions, faces, lines, value,
+         name, header, smoothing) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError('not a mesh cache entry')
+
+        mesh = Mesh(face_size=face_size)
+        sizes = ((name, None), (header, None), (smoothing, None),
+                 (8 * positions, 'd'), (4 * faces, 'I'), (4 * lines, 'I'))
+        if HEADER.size + sum(size for size, _ in sizes) != len(data):
+            raise ValueError('truncated mesh cache entry')
+
+        fields = []
+        start = HEADER.size
+        for size, typecode in sizes:
+            chunk = data[start:start + size]
+            fields.append(chunk.decode() if typecode is None else _native(typecode, chunk))
+            start += size
+
+        mesh.name, mesh.header, mesh.smoothing = fields[:3]
+        mesh.positions, mesh.faces, mesh.lines = fields[3:]
+
+        return mesh, value
+
+    def entries(self):
+
+        # (last use, size, path) of every entry, least recently used first
+        result = []
+        for name in os.listdir(self.path):
+            if name.endswith('.mesh'):
+                path = os.path.join(self.path, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                result.append((info.st_mtime, info.st_size, path))
+        result.sort()
+        return result
+
+    def evict(self):
+
+        # Stale temporary files first, then the least recently used entries
+        # until the cache fits in max_size
+        now = time.time()
+        for name in os.listdir(self.path):
+            if name.endswith('.tmp'):
+                path = os.path.join(self.path, name)
+                try:
+                    if now - os.stat(path).st_mtime > STALE_TEMPORARY:
+                        os.remove(path)
+                except OSError:
+                    continue
+
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
+
+    def stats(self):
+        entries = self.entries()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'size': sum(size for _, size, _ in entries),
+        }
@@ -0,0 +1,421 @@
+"""
+Mesh output formats.
+
+save_mesh picks a writer from the output extension (or an explicit
+format name) and hands it a list of parts, each a (name, material, mesh)
+tuple. Binary writers dump packed little-endian float32 positions and
+uint32 indices straight from the mesh arrays:
+
+    obj  Wavefront OBJ (text)
+    ply  binary PLY
+    stl  binary STL
+    glb  glTF 2.0 binary, with .mtl materials mapped to PBR materials
+"""
+
+import json
+import os
+import struct
+import sys
+
+from array import array
+from math import sqrt
+
+from .mesh import Mesh
+from .obj import ObjWriter, save_obj
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def format_of(path, format=None):
+    format = (format or os.path.splitext(path)[1][1:]).lower()
+    if format not in WRITERS:
+        raise ValueError('unsupported output format: ' + format)
+    return format
+
+
+def save_mesh(path, parts, format=None, materials=None, precision=None,
+              normals=False):
+
+    # 'parts' is a Mesh or a list of (name, material, mesh) tuples.
+    # 'normals' adds smooth vertex normals to obj and glb output.
+
+    format = format_of(path, format)
+
+    if isinstance(parts, Mesh):
+        if format == 'obj':
+            save_obj(parts, path, precision, normals)
+            return
+        parts = [(parts.name, None, parts)]
+
+    WRITERS[format](path, parts, materials=materials, precision=precision,
+                    normals=normals)
+
+
+def load_mtl(mtl_file):
+
+    # Material name -> {statement: list of floats}
+
+    materials = {}
+    current = None
+
+    with open(mtl_file) as file:
+        for line in file:
+            words = line.split()
+            if not words or words[0].startswith('#'):
+                continue
+            if words[0] == 'newmtl':
+                current = materials.setdefault(words[1], {})
+            elif current is not None:
+                try:
+                    current[words[0]] = [float(w) for w in words[1:]]
+                except ValueError:
+                    pass  # texture maps and other non-numeric statements
+
+    return materials
+
+
+def triangles(mesh):
+
+    # Flat triangle indices, fan-triangulating larger faces
+
+    n = mesh.face_size
+    if n == 3:
+        return mesh.faces
+
+    result = array('I')
+    faces = mesh.faces
+    for i in range(0, len(faces), n):
+        for k in range(1, n - 1):
+            result.extend((faces[i], faces[i + k], faces[i + k + 1]))
+    return result
+
+
+def merge(parts):
+
+    # Single triangle mesh with every part's vertices and faces
+
+    result = Mesh()
+    for name, material, mesh in parts:
+        offset = result.vertex_count
+        result.positions.extend(mesh.positions)
+        tris = triangles(mesh)
+        if offset == 0:
+            result.faces.extend(tris)
+        elif np is not None:
+            result.faces.frombytes(
+                (np.frombuffer(tris, dtype=np.uint32) + np.uint32(offset)).tobytes())
+        else:
+            result.faces.extend(i + offset for i in tris)
+    return result
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _float32(positions):
+    if np is not None:
+        return np.frombuffer(positions, dtype=np.float64).astype('<f4').tobytes()
+    return _little_endian(array('f', positions))
+
+
+def write_obj(path, parts, materials=None, precision=None, normals=False):
+
+    with open(path, 'w') as file:
+        writer = ObjWriter(file, precision)
+        offset = 1
+        for name, material, mesh in parts:
+            writer.write('o ' + (name or 'object') + '\n')
+            writer.write_vertices(mesh.positions)
+            if normals:
+                writer.write_vertices(mesh.vertex_normals(), tag='vn')
+            if material:
+                writer.write('usemtl ' + material + '\n')
+            writer.write_faces(mesh.faces, mesh.face_size, base=offset,
+                               normals=normals)
+            offset += mesh.vertex_count
+        writer.flush()
+
+
+def write_ply(path, parts, materials=None, precision=None, normals=False):
+
+    mesh = merge(parts)
+    face_count = mesh.face_count
+
+    header = ('ply\n'
+              'format binary_little_endian 1.0\n'
+              'element vertex ' + str(mesh.vertex_count) + '\n'
+              'property float x\n'
+              'property float y\n'
+              'property float z\n'
+              'element face ' + str(face_count) + '\n'
+              'property list uchar uint vertex_indices\n'
+              'end_header\n')
+
+    # Every face record is a uchar 3 followed by three uint32 indices;
+    # interleave them with strided slice copies
+    indices = _little_endian(mesh.faces)
+    records = bytearray(13 * face_count)
+    records[0::13] = b'\x03' * face_count
+    for k in range(12):
+        records[1 + k::13] = indices[k::12]
+
+    with open(path, 'wb') as file:
+        file.write(header.encode('ascii'))
+        file.write(_float32(mesh.positions))
+        file.write(records)
+
+
+def write_stl(path, parts, materials=None, precision=None, normals=False):
+
+    # STL always stores face normals
+
+    mesh = merge(parts)
+    face_count = mesh.face_count
+    n = mesh.face_normals()
+
+    with open(path, 'wb') as file:
+        file.write(b'binary STL'.ljust(80, b'\0'))
+        file.write(struct.pack('<I', face_count))
+
+        if np is not None:
+            records = np.zeros(face_count, dtype=[('normal', '<f4', 3),
+                                                  ('corners', '<f4', (3, 3)),
+                                                  ('attribute', '<u2')])
+            records['normal'] = np.frombuffer(n, dtype=np.float64).reshape(-1, 3)
+            records['corners'] = mesh.positions_view()[mesh.faces_view()]
+            file.write(records.tobytes())
+            return
+
+        record = struct.Struct('<12fH')
+        p = mesh.positions
+        for f, (a, b, c) in enumerate(mesh.face_tuples()):
+            file.write(record.pack(n[3 * f], n[3 * f + 1], n[3 * f + 2],
+                                   p[3 * a], p[3 * a + 1], p[3 * a + 2],
+                                   p[3 * b], p[3 * b + 1], p[3 * b + 2],
+                                   p[3 * c], p[3 * c + 1], p[3 * c + 2], 0))
+
+
+def gltf_material(name, mtl):
+
+    # Wavefront .mtl statements to a glTF metallic-roughness material
+
+    kd = (mtl.get('Kd', [0.8, 0.8, 0.8]) + [0, 0, 0])[:3]
+    alpha = mtl.get('d', [1.0])[0]
+    shininess = min(max(mtl.get('Ns', [0.0])[0], 0.0), 1000.0)
+
+    material = {
+        'name': name,
+        'pbrMetallicRoughness': {
+            'baseColorFactor': kd + [alpha],
+            'metallicFactor': 0.0,
+            'roughnessFactor': 1.0 - sqrt(shininess / 1000.0)}}
+
+    ke = mtl.get('Ke')
+    if ke and any(ke[:3]):
+        material['emissiveFactor'] = (ke + [0, 0, 0])[:3]
+    if alpha < 1.0:
+        material['alphaMode'] = 'BLEND'
+
+    return material
+
+
+class GlbBuilder:
+
+    # Accumulates buffer views, accessors, meshes and nodes of a glTF
+    # document whose binary data lives in a single GLB buffer
+
+    def __init__(self, materials=None):
+        self.materials = materials or {}
+        self.gltf = {'asset': {'version': '2.0', 'generator': 'meshlib'},
+                     'scene': 0, 'scenes': [{'nodes': []}], 'nodes': [],
+                     'meshes': [], 'accessors': [], 'bufferViews': [],
+                     'buffers': []}
+        self.chunks = []
+        self.length = 0
+        self.material_index = {}
+
+    def add_view(self, data, target=None):
+        view = {'buffer': 0, 'byteOffset': self.length, 'byteLength': len(data)}
+        if target:
+            view['target'] = target
+        self.chunks.append(data)
+        self.length += len(data)
+        padding = -self.length % 4
+        if padding:
+            self.chunks.append(b'\0' * padding)
+            self.length += padding
+        self.gltf['bufferViews'].append(view)
+        return len(self.gltf['bufferViews']) - 1
+
+    def add_accessor(self, view, component, count, kind, **extra):
+        accessor = {'bufferView': view, 'componentType': component,
+                    'count': count, 'type': kind}
+        accessor.update(extra)
+        self.gltf['accessors'].append(accessor)
+        return len(self.gltf['accessors']) - 1
+
+    def material(self, name):
+        if name not in self.material_index:
+            self.gltf.setdefault('materials', []).append(
+                gltf_material(name, self.materials.get(name, {})))
+            self.material_index[name] = len(self.gltf['materials']) - 1
+        return self.material_index[name]
+
+    def add_positions(self, positions):
+        p = positions
+        bounds = {'min': [min(p[0::3]), min(p[1::3]), min(p[2::3])],
+                  'max': [max(p[0::3]), max(p[1::3]), max(p[2::3])]}
+        view = self.add_view(_float32(p), 34962)
+        return self.add_accessor(view, 5126, len(p) // 3, 'VEC3', **bounds)
+
+    def add_mesh(self, name, material, mesh, normals=False):
+        if mesh.vertex_count == 0:
+            return None
+        primitive = {'attributes': {'POSITION': self.add_positions(mesh.positions)}}
+        if normals:
+            view = self.add_view(_float32(mesh.vertex_normals()), 34962)
+            primitive['attributes']['NORMAL'] = self.add_accessor(
+                view, 5126, mesh.vertex_count, 'VEC3')
+        tris = triangles(mesh)
+        if len(tris):
+            view = self.add_view(_little_endian(tris), 34963)
+            primitive['indices'] = self.add_accessor(view, 5125, len(tris), 'SCALAR')
+        else:
+            primitive['mode'] = 0  # points only
+        if material:
+            primitive['material'] = self.material(material)
+        self.gltf['meshes'].append({'name': name, 'primitives': [primitive]})
+        return len(self.gltf['meshes']) - 1
+
+    def add_displacements(self, count, indices, offsets):
+
+        # Morph target accessor of 'count' VEC3 displacements, all zero but
+        # those of the vertices in 'indices' (increasing), stored sparse
+        accessor = {'componentType': 5126, 'count': count, 'type': 'VEC3'}
+
+        bounds = [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
+        if len(indices):
+            values = array('d', offsets)
+            for axis in range(3):
+                column = values[axis::3]
+                low, high = min(column), max(column)
+                if len(indices) < count:
+                    low, high = min(low, 0.0), max(high, 0.0)
+                bounds[0][axis], bounds[1][axis] = low, high
+            accessor['sparse'] = {
+                'count': len(indices),
+                'indices': {'bufferView': self.add_view(_little_endian(array('I', indices))),
+                            'componentType': 5125},
+                'values': {'bufferView': self.add_view(_float32(values))}}
+        accessor['min'], accessor['max'] = bounds
+
+        self.gltf['accessors'].append(accessor)
+        return len(self.gltf['accessors']) - 1
+
+    def add_targets(self, mesh, targets):
+
+        # 'targets' holds one (indices, offsets) pair per morph target of
+        # the mesh positions
+        primitive = self.gltf['meshes'][mesh]['primitives'][0]
+        count = self.gltf['accessors'][primitive['attributes']['POSITION']]['count']
+        primitive['targets'] = [
+            {'POSITION': self.add_displacements(count, indices, offsets)}
+            for indices, offsets in targets]
+        self.gltf['meshes'][mesh]['weights'] = [0.0] * len(targets)
+
+    def add_animation(self, name, times, channels, interpolation='LINEAR'):
+
+        # 'channels' maps node indices to their flat morph weights, one
+        # group per keyframe time
+        view = self.add_view(_float32(array('d', times)))
+        keyframes = self.add_accessor(view, 5126, len(times), 'SCALAR',
+                                  min=[min(times)], max=[max(times)])
+
+        animation = {'name': name, 'samplers': [], 'channels': []}
+        for node, weights in channels.items():
+            view = self.add_view(_float32(weights))
+            output = self.add_accessor(view, 5126, len(weights), 'SCALAR')
+            animation['samplers'].append({'input': keyframes, 'output': output,
+                                          'interpolation': interpolation})
+            animation['channels'].append({
+                'sampler': len(animation['samplers']) - 1,
+                'target': {'node': node, 'path': 'weights'}})
+
+        self.gltf.setdefault('animations', []).append(animation)
+
+    def add_instances(self, node, translations, scales):
+
+        # Adds a node drawing its mesh once per (translation, scale) pair
+        # with EXT_mesh_gpu_instancing; both are flat x y z arrays
+        extension = 'EXT_mesh_gpu_instancing'
+        attributes = {}
+        for attribute, values in (('TRANSLATION', translations), ('SCALE', scales)):
+            view = self.add_view(_float32(values))
+            attributes[attribute] = self.add_accessor(view, 5126, len(values) // 3, 'VEC3')
+
+        node['extensions'] = {extension: {'attributes': attributes}}
+        for key in ('extensionsUsed', 'extensionsRequired'):
+            if extension not in self.gltf.setdefault(key, []):
+                self.gltf[key].append(extension)
+
+        return self.add_node(node)
+
+    def add_node(self, node, root=True):
+        self.gltf['nodes'].append(node)
+        if root:
+            self.gltf['scenes'][0]['nodes'].append(len(self.gltf['nodes']) - 1)
+        return len(self.gltf['nodes']) - 1
+
+    def add_lods(self, nodes):
+
+        # Nodes from the most to the least detailed version of an object.
+        # Only the first one is in the scene; it lists the others with
+        # MSFT_lod, so viewers without the extension draw full detail.
+        if not nodes:
+            return None
+        first = self.add_node(nodes[0])
+        if len(nodes) > 1:
+            nodes[0]['extensions'] = {'MSFT_lod': {
+                'ids': [self.add_node(node, root=False) for node in nodes[1:]]}}
+            if 'MSFT_lod' not in self.gltf.setdefault('extensionsUsed', []):
+                self.gltf['extensionsUsed'].append('MSFT_lod')
+        return first
+
+    def save(self, path):
+        binary = b''.join(self.chunks)
+        self.gltf['buffers'] = [{'byteLength': len(binary)}]
+        document = json.dumps(self.gltf, separators=(',', ':')).encode('utf-8')
+        document += b' ' * (-len(document) % 4)
+
+        with open(path, 'wb') as file:
+            file.write(struct.pack('<4sII', b'glTF', 2,
+                                   12 + 8 + len(document) + 8 + len(binary)))
+            file.write(struct.pack('<I4s', len(document), b'JSON'))
+            file.write(document)
+            file.write(struct.pack('<I4s', len(binary), b'BIN\0'))
+            file.write(binary)
+
+
+def write_glb(path, parts, materials=None, precision=None, normals=False):
+
+    builder = GlbBuilder(materials)
+    for name, material, mesh in parts:
+        index = builder.add_mesh(name, material, mesh, normals)
+        if index is not None:
+            builder.add_node({'name': name or 'object', 'mesh': index})
+    builder.save(path)
+
+
+WRITERS = {
+    'obj': write_obj,
+    'ply': write_ply,
+    'stl': write_stl,
+    'glb': write_glb,
+}
@@ -0,0 +1,115 @@
+"""
+Compact mesh representation.
+
+Vertex positions are stored in a single flat float array (x0 y0 z0 x1 ...)
+and connectivity in a single flat array of zero-based vertex indices, so a
+mesh costs a few bytes per element instead of one Python object per vertex.
+"""
+
+from array import array
+
+from .normals import face_normals, vertex_normals
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Mesh:
+    def __init__(self, positions=None, faces=None, face_size=3):
+        self.positions = positions if positions is not None else array('d')
+        self.faces = faces if faces is not None else array('I')
+        self.face_size = face_size
+
+        # Polyline segments as pairs of vertex indices
+        self.lines = array('I')
+
+        # OBJ metadata kept so tools can reproduce their input header
+        self.header = ''
+        self.name = ''
+        self.smoothing = ''
+
+        # Normals computed on demand, see invalidate()
+        self.cache = {}
+
+    @property
+    def vertex_count(self):
+        return len(self.positions) // 3
+
+    @property
+    def face_count(self):
+        return len(self.faces) // self.face_size
+
+    def vertex(self, i):
+        p = self.positions
+        return p[3 * i], p[3 * i + 1], p[3 * i + 2]
+
+    def face(self, i):
+        n = self.face_size
+        return tuple(self.faces[n * i:n * i + n])
+
+    def vertices(self):
+        p = self.positions
+        return zip(p[0::3], p[1::3], p[2::3])
+
+    def face_tuples(self):
+        n = self.face_size
+        return zip(*(self.faces[k::n] for k in range(n)))
+
+    def line_tuples(self):
+        return zip(self.lines[0::2], self.lines[1::2])
+
+    def add_vertex(self, x, y, z):
+        self.positions.extend((x, y, z))
+        self.invalidate()
+        return self.vertex_count - 1
+
+    def add_face(self, *indices):
+        self.faces.extend(indices)
+        self.invalidate()
+
+    # Normals are computed for the whole mesh the first time they are
+    # asked for and cached. add_vertex and add_face drop the cache; code
+    # writing to the arrays directly must call invalidate() itself.
+
+    def invalidate(self):
+        self.cache.clear()
+
+    def cached(self, name, compute):
+        if name not in self.cache:
+            self.cache[name] = compute(self)
+        return self.cache[name]
+
+    def face_normals(self):
+        # flat x y z unit normal per face, zero for degenerate faces
+        return self.cached('face_normals', face_normals)[0]
+
+    def degenerate_faces(self):
+        # indices of the faces with zero area
+        return self.cached('face_normals', face_normals)[1]
+
+    def vertex_normals(self):
+        # flat x y z smooth normal per vertex, averaged over its faces
+        # weighted by their area
+        return self.cached('vertex_normals', vertex_normals)[0]
+
+    # NumPy interop (optional dependency). Views share memory with the
+    # arrays, so no copy is made until one side is modified.
+
+    def positions_view(self):
+        return np.frombuffer(self.positions, dtype=np.float64).reshape(-1, 3)
+
+    def faces_view(self):
+        return np.frombuffer(self.faces, dtype=np.uint32).reshape(
+            -1, self.face_size)
+
+    @classmethod
+    def from_numpy(cls, positions, faces):
+        faces = np.asarray(faces)
+        mesh = cls(face_size=faces.shape[1] if faces.ndim == 2 else 3)
+        mesh.positions.frombytes(
+            np.ascontiguousarray(positions, dtype=np.float64).tobytes())
+        mesh.faces.frombytes(
+            np.ascontiguousarray(faces, dtype=np.uint32).tobytes())
+        return mesh
@@ -0,0 +1,313 @@
+"""
+Wavefront OBJ input and output.
+
+Face corners are resolved by direct array indexing, so loading is linear
+in the size of the file. Relative (negative) indices and v/vt/vn corner
+tokens are supported; polygons are triangulated as fans and polylines
+are split into segments.
+
+Input files are memory-mapped and parsed in byte ranges split on line
+boundaries, in parallel processes for large files.
+"""
+
+import mmap
+import multiprocessing
+import os
+
+from array import array
+from itertools import islice
+
+from .mesh import Mesh
+
+CHUNK_SIZE = 1 << 20  # characters buffered between file writes
+BATCH = 4096  # records formatted per string operation
+RANGE_SIZE = 1 << 22  # bytes of input parsed at a time
+PARALLEL_SIZE = 1 << 26  # inputs this large are parsed by every core
+
+
+def _text(line):
+    # Bytes of a line as read by a text mode file (universal newlines)
+    text = line.decode()
+    if text.endswith(('\n', '\r')):
+        text = text.rstrip('\r\n') + '\n'
+    return text
+
+
+def _fan(corners, tag):
+    # Positions in 'corners' of the triangles of a fan, or of the segments
+    # of a polyline
+    if tag == b'f':
+        return [k for i in range(1, len(corners) - 1) for k in (0, i, i + 1)]
+    return [k for i in range(len(corners) - 1) for k in (i, i + 1)]
+
+
+def _parse(data):
+
+    # Parses the OBJ records of 'data' (whole lines) into typed arrays.
+    # The vertices defined before 'data' are not known yet: positive
+    # indices are absolute already, negative ones are made relative to the
+    # first vertex of 'data' and listed in 'relative' with their place in
+    # the faces or lines array, to be shifted later. The furthest forward
+    # and backward references are kept so they can be checked then.
+
+    positions = array('d')
+    faces = array('I')
+    lines = array('I')
+    relative = {b'f': [], b'l': []}
+    header = []
+    name = smoothing = None
+    ahead = behind = None
+
+    for line in data.splitlines(True):
+        words = line.split()
+        if not words:
+            continue
+        tag = words[0]
+        if tag == b'v':
+            positions.extend(
+                (float(words[1]), float(words[2]), float(words[3])))
+        elif tag == b'f' or tag == b'l':
+            if b'/' in line:
+                corners = [int(w.partition(b'/')[0]) for w in words[1:]]
+            else:
+                corners = list(map(int, words[1:]))
+            if not corners:
+                continue
+
+            vertex_count = len(positions) // 3
+            target = faces if tag == b'f' else lines
+
+            # Usual case: absolute indices only
+            low = min(corners)
+            if low > 0:
+                top = max(corners)
+                if ahead is None or top - 1 - vertex_count > ahead[0]:
+                    ahead = (top - 1 - vertex_count, words[1 + corners.index(top)])
+                if tag == b'f' and len(corners) == 3:
+                    target.extend((corners[0] - 1, corners[1] - 1, corners[2] - 1))
+                else:
+                    target.extend(corners[k] - 1 for k in _fan(corners, tag))
+                continue
+
+            if low == 0:
+                raise ValueError('face references undefined vertex '
+                                 + words[1 + corners.index(0)].decode())
+
+            shifted = set()
+            for k, index in enumerate(corners):
+                if index > 0:
+                    index -= 1
+                    if ahead is None or index - vertex_count > ahead[0]:
+                        ahead = (index - vertex_count, words[1 + k])
+                else:
+                    index += vertex_count
+                    if behind is None or index < behind[0]:
+                        behind = (index, words[1 + k])
+                    shifted.add(k)
+                corners[k] = index
+
+            # Negative indices wait for the offset of this range
+            for k in _fan(corners, tag):
+                if k in shifted:
+                    relative[tag].append((len(target), corners[k]))
+                    target.append(0)
+                else:
+                    target.append(corners[k])
+        elif tag.startswith(b'#'):
+            header.append(_text(line))
+        elif tag == b'o':
+            name = line[1:].strip().decode()
+        elif tag == b's':
+            # A bare 's' has no group to keep, like a bare 'o'
+            smoothing = words[1].decode() if len(words) > 1 else ''
+
+    return (positions, faces, lines, (relative[b'f'], relative[b'l']), header, name,
+            smoothing, ahead, behind)
+
+
+def _parse_range(job):
+
+    # Parses bytes start:end of the file, in a worker process
+    path, start, end = job
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _parse(data[start:end])
+
+
+def _ranges(path, count):
+
+    # About 'count' byte ranges covering the file, each ending after a
+    # newline (or at the end of the file) so no line is split
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    ranges = []
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            for i in range(1, count + 1):
+                end = size if i == count else data.find(b'\n', size * i // count) + 1
+                if end <= 0:
+                    end = size
+                if end > start:
+                    ranges.append((path, start, end))
+                    start = end
+                if start == size:
+                    break
+
+    return ranges
+
+
+def load_obj(obj_file, workers=None):
+
+    # The file is parsed in byte ranges, in a pool of 'workers' processes
+    # when given. By default files of PARALLEL_SIZE bytes or more use one
+    # process per core. Ranges are merged in file order; the vertex count
+    # of the ranges before each one (a prefix sum) turns its relative
+    # indices into absolute ones.
+
+    size = os.path.getsize(obj_file)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if size >= PARALLEL_SIZE else 1
+
+    # Daemonic processes (pool workers themselves) cannot start a pool
+    if multiprocessing.current_process().daemon:
+        workers = 1
+
+    jobs = _ranges(obj_file, max(workers, -(-size // RANGE_SIZE)))
+
+    if workers > 1 and len(jobs) > 1:
+        with multiprocessing.Pool(min(workers, len(jobs))) as pool:
+            return _merge(pool.imap(_parse_range, jobs))
+
+    return _merge(map(_parse_range, jobs))
+
+
+def _merge(chunks):
+
+    mesh = Mesh()
+    positions = mesh.positions
+    header = []
+
+    for (chunk_positions, faces, lines, relative, chunk_header, name, smoothing,
+         ahead, behind) in chunks:
+
+        offset = len(positions) // 3
+
+        # References checked against the vertices defined before them
+        if ahead is not None and ahead[0] >= offset:
+            raise ValueError('face references undefined vertex ' + ahead[1].decode())
+        if behind is not None and behind[0] + offset < 0:
+            raise ValueError('face references undefined vertex ' + behind[1].decode())
+
+        for target, chunk, rel in ((mesh.faces, faces, relative[0]),
+                                   (mesh.lines, lines, relative[1])):
+            base = len(target)
+            target.extend(chunk)
+            for i, index in rel:
+                target[base + i] = offset + index
+
+        positions.extend(chunk_positions)
+        header.extend(chunk_header)
+        if name is not None:
+            mesh.name = name
+        if smoothing is not None:
+            mesh.smoothing = smoothing
+
+    mesh.header = ''.join(header)
+
+    return mesh
+
+
+class ObjWriter:
+
+    # Streams OBJ records to an open text file. Vertices and faces are
+    # formatted BATCH elements per string operation and the text is handed
+    # to the file in chunks of about chunk_size characters, so memory use
+    # does not grow with the size of the output.
+
+    def __init__(self, file, precision=None, chunk_size=CHUNK_SIZE, vertex_count=0):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.number = '%s' if precision is None else '%.' + str(precision) + 'f'
+        self.parts = []
+        self.buffered = 0
+
+        # 'v' records written so far: objects number their faces from here.
+        # A fragment of a larger file starts counting at its offset.
+        self.vertex_count = vertex_count
+
+    def write(self, text):
+        self.parts.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(''.join(self.parts))
+        self.parts = []
+        self.buffered = 0
+
+    def write_vertices(self, coords, tag='v'):
+        # coords: flat x y z sequence or iterable
+        line = tag + (' ' + self.number) * 3 + '\n'
+        for chunk in _batches(coords, 3 * BATCH):
+            self.write((line * (len(chunk) // 3)) % chunk)
+            if tag == 'v':
+                self.vertex_count += len(chunk) // 3
+
+    def write_faces(self, indices, face_size=3, base=1, tag='f', normals=False):
+        # indices: flat vertex indices, shifted by 'base' when written.
+        # With 'normals' every corner also refers to the vn of the same
+        # number (v//vn).
+        corner = ' %d//%d' if normals else ' %d'
+        line = tag + corner * face_size + '\n'
+        for chunk in _batches(indices, face_size * BATCH):
+            if base:
+                chunk = tuple(map(base.__add__, chunk))
+            count = len(chunk) // face_size
+            if normals:
+                chunk = tuple(i for i in chunk for _ in (0, 1))
+            self.write((line * count) % chunk)
+
+
+def _batches(values, size):
+
+    # Tuples of at most 'size' plain Python numbers taken from 'values'
+
+    if hasattr(values, '__len__'):
+        for i in range(0, len(values), size):
+            chunk = values[i:i + size]
+            yield tuple(chunk.tolist() if hasattr(chunk, 'tolist') else chunk)
+    else:
+        values = iter(values)
+        while True:
+            chunk = tuple(islice(values, size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def save_obj(mesh, obj_file, precision=None, normals=False):
+
+    # 'normals' adds one smooth vn per vertex, referenced from the faces
+
+    with open(obj_file, 'w') as file:
+        writer = ObjWriter(file, precision)
+
+        writer.write(mesh.header)
+        if mesh.name:
+            writer.write('o ' + mesh.name + '\n')
+
+        writer.write_vertices(mesh.positions)
+        if normals:
+            writer.write_vertices(mesh.vertex_normals(), tag='vn')
+
+        if mesh.smoothing:
+            writer.write('s ' + mesh.smoothing + '\n')
+
+        writer.write_faces(mesh.faces, mesh.face_size, normals=normals)
+        writer.write_faces(mesh.lines, 2, tag='l')
+
+        writer.flush()
@@ -0,0 +1,267 @@
+"""
+Mesh connectivity queries.
+
+EdgeIndex is built once per mesh in linear time and maps every edge to
+the faces using it, together with the half-edge (directed edge) each
+face contributes. edge_key and face_key give the canonical (sorted)
+form of an edge or a triangle for hashing.
+
+Vertex and Face objects are the per-face view of a mesh used by the
+pure-Python extrude and spin algorithms (to_objects and to_mesh convert
+between both). Prisms builds the faces joining a face to its moved copy
+for them, and prism_faces does the same over index arrays.
+"""
+
+from math import pow, sqrt
+
+from .mesh import Mesh
+from .weld import unique_faces
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def edge_key(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+def face_key(a, b, c):
+
+    # Same key for the same three vertices in any order, so faces can be
+    # looked up regardless of their winding
+    if a > b:
+        a, b = b, a
+    if b > c:
+        b, c = c, b
+        if a > b:
+            a, b = b, a
+    return (a, b, c)
+
+
+class EdgeIndex:
+
+    # Undirected edge (low, high) -> list of (face, a, b) half-edges, in
+    # face order, where a -> b follows the winding of the face
+
+    def __init__(self, mesh):
+        self.mesh = mesh
+        self.edges = {}
+
+        f = 0
+        n = mesh.face_size
+        faces = mesh.faces
+        for i in range(0, len(faces), n):
+            for k in range(n):
+                a, b = faces[i + k], faces[i + (k + 1) % n]
+                self.edges.setdefault(edge_key(a, b), []).append((f, a, b))
+            f += 1
+
+    def __len__(self):
+        return len(self.edges)
+
+    def faces_of(self, a, b):
+        return [face for face, _, _ in self.edges.get(edge_key(a, b), ())]
+
+    def boundary(self):
+
+        # Edges used by exactly one face, oriented as in that face
+        return [(a, b) for users in self.edges.values() if len(users) == 1
+                for face, a, b in users]
+
+    def non_manifold(self):
+
+        # Edges shared by more than two faces
+        return [key for key, users in self.edges.items() if len(users) > 2]
+
+    def is_closed(self):
+        return all(len(users) == 2 for users in self.edges.values())
+
+    def twin(self, face, a, b):
+
+        # Face across the half-edge a -> b of 'face', None on a border
+        for other, c, d in self.edges.get(edge_key(a, b), ()):
+            if other != face:
+                return other
+        return None
+
+
+def boundary_edges(mesh):
+
+    # Edges used by exactly one face, oriented as in that face
+    return EdgeIndex(mesh).boundary()
+
+
+class Vertex:
+
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __str__(self):
+        return 'v' + ' ' + str(self.x) + ' ' + str(self.y) + ' ' + str(self.z)
+
+    def __eq__(self, v):
+        if isinstance(v, Vertex):
+            return self.x == v.x and self.y == v.y and self.z == v.z
+        else:
+            return False
+
+
+class Vector:
+
+    __slots__ = ('x', 'y', 'z', 'module')
+
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.module = sqrt(pow(self.x, 2) + pow(self.y, 2) + pow(self.z, 2))
+
+
+class Face:
+
+    __slots__ = ('v1', 'v2', 'v3', '_normal')
+
+    def __init__(self, v1, v2, v3):
+        self.v1 = v1
+        self.v2 = v2
+        self.v3 = v3
+        self._normal = None
+
+    @property
+    def vertices(self):
+        return (self.v1, self.v2, self.v3)
+
+    @property
+    def normal(self):
+
+        # Computed the first time it is used. Degenerate faces get a zero
+        # normal instead of failing.
+        if self._normal is None:
+            v1, v2, v3 = self.v1, self.v2, self.v3
+
+            a = Vector(v2.x - v1.x, v2.y - v1.y, v2.z - v1.z)
+
+            b = Vector(v3.x - v1.x, v3.y - v1.y, v3.z - v1.z)
+
+            n = Vector((a.y * b.z - a.z * b.y),
+                       (a.z * b.x - a.x * b.z),
+                       (a.x * b.y - a.y * b.x))
+
+            module = n.module or 1
+            self._normal = Vector(n.x/module, n.y/module, n.z/module)
+
+        return self._normal
+
+    @property
+    def degenerate(self):
+        return self.normal.module == 0
+
+    def __eq__(self, f):
+        if isinstance(f, Face):
+            other_vertices = [f.v1, f.v2, f.v3]
+            return (self.v1 in other_vertices and
+                    self.v2 in other_vertices and
+                    self.v3 in other_vertices)
+        else:
+            return False
+
+
+def to_objects(mesh):
+
+    vertices = [Vertex(x, y, z) for x, y, z in mesh.vertices()]
+
+    faces = [Face(vertices[a], vertices[b], vertices[c])
+             for a, b, c in mesh.face_tuples()]
+
+    return vertices, faces
+
+
+def to_mesh(vertices, faces, like=None):
+
+    # Vertex ids are assigned here, from the position in 'vertices'
+    index = {id(v): i for i, v in enumerate(vertices)}
+
+    mesh = Mesh()
+    if like is not None:
+        mesh.header = like.header
+        mesh.name = like.name
+        mesh.smoothing = like.smoothing
+
+    for v in vertices:
+        mesh.positions.extend((v.x, v.y, v.z))
+    for f in faces:
+        mesh.faces.extend(index[id(v)] for v in f.vertices)
+
+    return mesh
+
+
+def _walls(v1, v2, v3, new_v1, new_v2, new_v3):
+
+    # Six lateral faces joining a face to its moved copy
+    return ((v1, v2, new_v2), (v1, new_v1, new_v2),
+            (v2, v3, new_v3), (v2, new_v2, new_v3),
+            (v1, v3, new_v3), (v1, new_v1, new_v3))
+
+
+class Prisms:
+
+    # Faces joining Face objects to their moved copies: the frontal face,
+    # unless one with the same vertices exists, and the side walls. Vertex
+    # triples (sorted object ids) of the faces built so far are kept for
+    # constant time duplicate checks. With 'unique_walls' a wall already
+    # built by a neighbouring face is not repeated.
+
+    def __init__(self, unique_walls=False):
+        self.unique_walls = unique_walls
+        self.frontal = set()
+        self.walls = set()
+
+    def faces(self, face, moved):
+
+        # New faces for 'face', given the moved copies of its vertices
+        new_v1, new_v2, new_v3 = moved
+        result = []
+
+        key = face_key(id(new_v1), id(new_v2), id(new_v3))
+        if key not in self.frontal:
+            self.frontal.add(key)
+            result.append(Face(new_v1, new_v2, new_v3))
+
+        for wall in _walls(face.v1, face.v2, face.v3, new_v1, new_v2, new_v3):
+            if self.unique_walls:
+                key = face_key(id(wall[0]), id(wall[1]), id(wall[2]))
+                if key in self.walls:
+                    continue
+                self.walls.add(key)
+            result.append(Face(*wall))
+
+        return result
+
+
+def prism_faces(faces, new_ids, unique_walls=False):
+
+    # Prisms over (F, 3) arrays with the vertex ids of every face and of
+    # its moved copy. Returns the kept faces in the same order.
+    # Frontal face followed by the six lateral faces, per input face
+    blocks = np.stack([new_ids] + [np.stack(wall, axis=1)
+                                   for wall in _walls(*faces.T, *new_ids.T)], axis=1)
+
+    # New frontal faces, skipping repeated vertex sets
+    keep = np.zeros((len(new_ids), 7), dtype=bool)
+    keep[unique_faces(new_ids), 0] = True
+
+    # Side walls, each vertex set once with 'unique_walls'
+    if unique_walls:
+        walls = np.zeros(len(new_ids) * 6, dtype=bool)
+        walls[unique_faces(blocks[:, 1:].reshape(-1, 3))] = True
+        keep[:, 1:] = walls.reshape(-1, 6)
+    else:
+        keep[:, 1:] = True
+
+    return blocks[keep]
@@ -0,0 +1,117 @@
+"""
+Affine transforms as 4x4 matrices, stored as lists of rows.
+
+A chain of transforms is multiplied into a single matrix first, so the
+mesh is traversed once however many steps the chain has. Transforms that
+mirror the mesh (negative determinant) also flip the winding of its
+faces to keep them facing outwards.
+"""
+
+from math import cos, radians, sin
+
+from .mesh import Mesh
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def identity():
+    return [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+
+def multiply(A, B):
+
+    # A * B: applying the result is applying B, then A
+    return [[sum(A[i][k] * B[k][j] for k in range(4)) for j in range(4)]
+            for i in range(4)]
+
+
+def translation(x, y, z):
+    M = identity()
+    M[0][3], M[1][3], M[2][3] = x, y, z
+    return M
+
+
+def scaling(x, y, z):
+    M = identity()
+    M[0][0], M[1][1], M[2][2] = x, y, z
+    return M
+
+
+def rotation(axis, angle):
+
+    # 'angle' degrees counterclockwise about the X, Y or Z axis
+    c = cos(radians(angle))
+    s = sin(radians(angle))
+
+    if axis == 'X':
+        return [[1.0, 0.0, 0.0, 0.0],
+                [0.0, c, -s, 0.0],
+                [0.0, s, c, 0.0],
+                [0.0, 0.0, 0.0, 1.0]]
+    elif axis == 'Y':
+        return [[c, 0.0, s, 0.0],
+                [0.0, 1.0, 0.0, 0.0],
+                [-s, 0.0, c, 0.0],
+                [0.0, 0.0, 0.0, 1.0]]
+    else:
+        return [[c, -s, 0.0, 0.0],
+                [s, c, 0.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+                [0.0, 0.0, 0.0, 1.0]]
+
+
+def compose(matrices):
+
+    # Single matrix applying 'matrices' in order, the first one first
+    M = identity()
+    for T in matrices:
+        M = multiply(T, M)
+    return M
+
+
+def determinant(M):
+
+    # Of the linear (upper left 3x3) part
+    return (M[0][0] * (M[1][1] * M[2][2] - M[1][2] * M[2][1])
+            - M[0][1] * (M[1][0] * M[2][2] - M[1][2] * M[2][0])
+            + M[0][2] * (M[1][0] * M[2][1] - M[1][1] * M[2][0]))
+
+
+def transform(mesh, M):
+
+    # New mesh with every vertex multiplied by M
+    result = Mesh(face_size=mesh.face_size)
+    result.header = mesh.header
+    result.name = mesh.name
+    result.smoothing = mesh.smoothing
+    result.lines.extend(mesh.lines)
+
+    # Both paths add the terms in the same order and give the same values
+    if np is not None:
+        x, y, z = mesh.positions_view().T
+        moved = np.empty((mesh.vertex_count, 3))
+        for row in range(3):
+            a, b, c, d = M[row]
+            moved[:, row] = a * x + b * y + c * z + d
+        result.positions.frombytes(moved.tobytes())
+    else:
+        (a, b, c, d), (e, f, g, h), (i, j, k, l) = M[0], M[1], M[2]
+        p = mesh.positions
+        result.positions.extend(
+            value
+            for x, y, z in zip(p[0::3], p[1::3], p[2::3])
+            for value in (a * x + b * y + c * z + d,
+                          e * x + f * y + g * z + h,
+                          i * x + j * y + k * z + l))
+
+    result.faces.extend(mesh.faces)
+    if determinant(M) < 0:
+        # A mirrored face keeps its normal only with reversed winding
+        n = mesh.face_size
+        for start in range(0, len(result.faces), n):
+            result.faces[start + 1:start + n] = result.faces[start + n - 1:start:-1]
+
+    return result
@@ -0,0 +1,180 @@
+"""
+Vertex welding on a spatial hash.
+
+Positions are floored to a grid of cell size epsilon and the integer
+cell coordinates are used as dictionary keys, so finding the vertex that
+already occupies a position is an O(1) expected lookup. The first
+position seen in a cell decides where the whole cell goes: to the
+earliest vertex registered in one of the 26 neighbouring cells within
+epsilon of it on every axis, or else to a new vertex. Positions either
+side of a cell boundary are welded this way too. An epsilon of 0 welds
+exactly equal positions only.
+
+weld_array applies the same rule to a whole NumPy array of positions.
+"""
+
+from itertools import product
+from math import floor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Cell offsets of the 26 neighbours of a cell
+NEIGHBOURS = [offset for offset in product((-1, 0, 1), repeat=3) if offset != (0, 0, 0)]
+
+# Odd multipliers of the cell hash used by weld_array, modulo 2**64
+HASH = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+
+
+class Welder:
+    def __init__(self, epsilon=0.0):
+        self.epsilon = epsilon
+        # cell -> vertex its positions are welded to
+        self.cells = {}
+        # cell -> (order, x, y, z, vertex) of the vertices registered
+        self.roots = {}
+        self.welded = 0
+
+    def key(self, x, y, z):
+        if self.epsilon > 0:
+            s = 1.0 / self.epsilon
+            return floor(x * s), floor(y * s), floor(z * s)
+        return x, y, z
+
+    def nearest(self, key, x, y, z):
+
+        # Earliest vertex registered in a neighbouring cell within epsilon
+        # on every axis, or None
+        if self.epsilon <= 0:
+            return None
+        e = self.epsilon
+        i, j, k = key
+        best = None
+        for di, dj, dk in NEIGHBOURS:
+            root = self.roots.get((i + di, j + dj, k + dk))
+            if (root is not None and (best is None or root[0] < best[0])
+                    and abs(root[1] - x) <= e and abs(root[2] - y) <= e
+                    and abs(root[3] - z) <= e):
+                best = root
+        return None if best is None else best[4]
+
+    def find(self, x, y, z):
+        key = self.key(x, y, z)
+        existing = self.cells.get(key)
+        return existing if existing is not None else self.nearest(key, x, y, z)
+
+    def weld(self, x, y, z, vertex):
+        # Returns the vertex the position welds to, or registers 'vertex'
+        key = self.key(x, y, z)
+        existing = self.cells.get(key)
+        if existing is None:
+            existing = self.nearest(key, x, y, z)
+            if existing is None:
+                existing = vertex
+                self.roots[key] = (len(self.roots), x, y, z, vertex)
+            self.cells[key] = existing
+        if existing is not vertex:
+            self.welded += 1
+        return existing
+
+    def __len__(self):
+        return len(self.roots)
+
+
+def unique_rows(rows):
+
+    # Distinct rows of a 2D array in order of first appearance. Returns the
+    # index of each first occurrence and, for every row, the position of
+    # its first occurrence in that list.
+
+    order = np.lexsort(rows.T[::-1])
+    sorted_rows = rows[order]
+
+    starts = np.ones(len(rows), dtype=bool)
+    starts[1:] = (sorted_rows[1:] != sorted_rows[:-1]).any(axis=1)
+    group = np.cumsum(starts) - 1
+
+    # lexsort is stable, so each group starts at its first occurrence
+    first = order[starts]
+    appearance = np.argsort(first, kind='stable')
+    rank = np.empty_like(appearance)
+    rank[appearance] = np.arange(len(first))
+
+    inverse = np.empty(len(rows), dtype=np.int64)
+    inverse[order] = rank[group]
+
+    return first[appearance], inverse
+
+
+def unique_faces(faces):
+
+    # Index of the first face with each vertex set, in order of appearance,
+    # whatever the order of the vertices in the face
+    first, _ = unique_rows(np.sort(faces, axis=1))
+    return first
+
+
+def weld_array(positions, epsilon=0.0):
+
+    # Vectorized Welder over an (N, 3) array: same keys, same choice of
+    # first occurrence. Returns (first, inverse) as unique_rows does.
+
+    if epsilon <= 0:
+        return unique_rows(positions)
+
+    keys = np.floor(positions * (1.0 / epsilon)).astype(np.int64)
+    cells, inverse = unique_rows(keys)
+    count = len(cells)
+    points = positions[cells]
+    cell_keys = keys[cells]
+
+    # Cells are looked up by a linear hash of their key in a sorted array,
+    # so the hash of a neighbour is that of the cell plus a constant and
+    # the probes of a whole offset come already sorted. Keys are compared
+    # as bytes instead in the unlikely case of a collision.
+    table = cell_keys.astype(np.uint64) @ np.array(HASH, dtype=np.uint64)
+    order = np.argsort(table)
+    table = table[order]
+    hashed = not (table[1:] == table[:-1]).any()
+    if not hashed:
+        row = np.dtype((np.void, cell_keys.dtype.itemsize * 3))
+        table = np.ascontiguousarray(cell_keys).view(row).ravel()
+        order = np.argsort(table)
+        table = table[order]
+        sorted_keys = cell_keys[order]
+
+    # (cell, earlier neighbouring cell) pairs whose first positions are
+    # within epsilon on every axis. Half the offsets find every pair, each
+    # one from the cell on its other side. A hash matching by chance only
+    # adds a pair of cells that the distance check rejects or that is
+    # found under its own offset anyway.
+    pairs = []
+    for offset in NEIGHBOURS[:len(NEIGHBOURS) // 2]:
+        if hashed:
+            shift = sum(o * h for o, h in zip(offset, HASH)) % (1 << 64)
+            probe = table + np.uint64(shift)
+        else:
+            probe = np.ascontiguousarray(sorted_keys + offset).view(row).ravel()
+        at = np.minimum(np.searchsorted(table, probe), max(count - 1, 0))
+        found = np.flatnonzero(table[at] == probe)
+        cell, other = order[found], order[at[found]]
+        close = (np.abs(points[other] - points[cell]) <= epsilon).all(axis=1)
+        cell, other = cell[close], other[close]
+        pairs.append(np.stack((np.maximum(cell, other), np.minimum(cell, other)), axis=1))
+    pairs = np.concatenate(pairs)
+    pairs = pairs[np.lexsort(pairs.T[::-1])]
+
+    # Cells are decided in order of appearance as the Welder does: a cell
+    # goes to its earliest close neighbour holding a vertex of its own.
+    # Only cells with close neighbours need this loop.
+    target = list(range(count))
+    for cell, other in pairs.tolist():
+        if target[cell] == cell and target[other] == other:
+            target[cell] = other
+    target = np.array(target, dtype=np.int64)
+
+    roots = target == np.arange(count)
+    rank = np.cumsum(roots) - 1
+    return cells[roots], rank[target][inverse]